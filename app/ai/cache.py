@@ -0,0 +1,170 @@
+"""
+LLM Response Cache
+In-process caches that let the chatbot skip repeated LLM calls
+"""
+import math
+import re
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase and collapse punctuation/whitespace so trivial variations match"""
+    return _NON_WORD_RE.sub(" ", text.lower()).strip()
+
+
+# Words that can differ between two phrasings of the same question
+_STOPWORDS = frozenset(
+    "a an the is are was were be am do does did i me my mine you your we our it its "
+    "what whats how much many can could would will should please tell show give "
+    "of for to in on at about with and or any some have has had there this that s m ll re ve d".split()
+)
+
+
+def _content_words(text: str) -> FrozenSet[str]:
+    """The words of a query that carry its meaning"""
+    return frozenset(word for word in normalize_query(text).split() if word not in _STOPWORDS)
+
+
+def _embed(text: str) -> Dict[str, float]:
+    """Embed text as an L2-normalized bag of character trigrams"""
+    padded = f" {normalize_query(text)} "
+    grams = Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+    norm = math.sqrt(sum(count * count for count in grams.values())) or 1.0
+    return {gram: count / norm for gram, count in grams.items()}
+
+
+def _cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+    """Cosine similarity of two normalized sparse vectors"""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(gram, 0.0) for gram, weight in a.items())
+
+
+class SemanticCache:
+    """
+    Similarity-based answer cache.
+    Entries are partitioned by a scope (e.g. a hash of model + system prompt)
+    so an answer is only ever reused for the same prompt context, and a lookup
+    only scans the entries of its own scope.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        max_entries: int = 1000,
+        ttl_seconds: float = 1800,
+        max_entries_per_scope: int = 50,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_entries_per_scope = max_entries_per_scope
+        self.ttl_seconds = ttl_seconds
+        # scope -> normalized query -> (expires_at, vector, content words, answer); scopes in LRU order
+        self._scopes: "OrderedDict[str, OrderedDict[str, Tuple[float, Dict[str, float], FrozenSet[str], str]]]" = OrderedDict()
+        self._size = 0
+
+    def get(self, scope: str, query: str) -> Optional[str]:
+        """Return the cached answer of the most similar query, if similar enough"""
+        entries = self._scopes.get(scope)
+        if not entries:
+            return None
+
+        vector = _embed(query)
+        words = _content_words(query)
+        now = time.monotonic()
+        best_key = None
+        best_score = self.threshold
+        expired = []
+        for key, (expires_at, cached_vector, cached_words, _) in entries.items():
+            if expires_at < now:
+                expired.append(key)
+                continue
+            # Trigrams blur single-word differences ("casual" vs "sick"), so the
+            # meaningful words must agree before similarity is even considered
+            if cached_words != words:
+                continue
+            score = _cosine(vector, cached_vector)
+            if score >= best_score:
+                best_key, best_score = key, score
+
+        for key in expired:
+            del entries[key]
+        self._size -= len(expired)
+        if not entries:
+            del self._scopes[scope]
+
+        if best_key is None:
+            return None
+
+        self._scopes.move_to_end(scope)
+        entries.move_to_end(best_key)
+        return entries[best_key][3]
+
+    def set(self, scope: str, query: str, answer: str) -> None:
+        """Store an answer, evicting the least recently used entries when full"""
+        entries = self._scopes.get(scope)
+        if entries is None:
+            entries = self._scopes[scope] = OrderedDict()
+        self._scopes.move_to_end(scope)
+
+        key = normalize_query(query)
+        if key not in entries:
+            self._size += 1
+        entries[key] = (time.monotonic() + self.ttl_seconds, _embed(query), _content_words(query), answer)
+        entries.move_to_end(key)
+
+        while len(entries) > self.max_entries_per_scope:
+            entries.popitem(last=False)
+            self._size -= 1
+
+        # Over the global bound, drop from the least recently used scopes first
+        while self._size > self.max_entries:
+            oldest_scope, oldest_entries = next(iter(self._scopes.items()))
+            oldest_entries.popitem(last=False)
+            self._size -= 1
+            if not oldest_entries:
+                del self._scopes[oldest_scope]
+
+    def clear(self) -> None:
+        """Drop all cached answers"""
+        self._scopes.clear()
+        self._size = 0
+
+
+class TTLCache:
+    """Exact-key LRU cache whose entries expire after a fixed time-to-live"""
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached values"""
+        self._entries.clear()
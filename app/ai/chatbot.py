@@ -2,46 +2,175 @@
 AI Chatbot Service
 Handles employee queries using LLM
 """
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Mapping, Optional, Tuple
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
+import asyncio
+import hashlib
+import html
 import json
+import logging
+import os
+import re
+import httpx
+import orjson
 from openai import AsyncOpenAI
 
+from app.ai.cache import SemanticCache, TTLCache
 from app.config import settings
-from app.models.employee import Employee
+from app.models.employee import Employee, EmployeeLeaveView
 from app.models.attendance import Attendance
 from app.models.leave import Leave, LeaveType
 
 
-class ChatbotService:
-    """AI-powered chatbot for employee assistance"""
-
-    def __init__(self):
-        """Initialize chatbot service"""
-        if getattr(settings, "GROQ_API_KEY", ""):
-            self.use_ai = True
-            self.client = AsyncOpenAI(
-                api_key=settings.GROQ_API_KEY,
-                base_url="https://api.groq.com/openai/v1",
-            )
-            self.model = settings.GROQ_MODEL
-        elif settings.OPENAI_API_KEY:
-            self.use_ai = True
-            self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-            self.model = settings.OPENAI_MODEL
-        else:
-            self.use_ai = False
-            self.client = None
-            self.model = None
-
-        self.knowledge_base = self._build_knowledge_base()
-
-    def _build_knowledge_base(self) -> Dict:
-        """Build knowledge base with company policies and procedures"""
-        return {
-            "leave_application": {
-                "question": "How do I apply for leave?",
-                "answer": """To apply for leave, follow these steps:
+logger = logging.getLogger(__name__)
+
+# Phrases and words that ask for the employee's own records
+_LEAVE_INTENT = ("leave balance", "how many leaves", "my leaves")
+_ATTENDANCE_INTENT = ("check in time", "my progress")
+# Word stems, so inflections ("attendances", "present-marked") count but "represent" doesn't
+_ATTENDANCE_STEM_RE = re.compile(r"\b(?:attendance|present)")
+# One scan of the query reports which multi-word intents are present
+_INTENT_RE = re.compile(
+    "(?P<leave>" + "|".join(re.escape(word) for word in _LEAVE_INTENT) + ")"
+    "|(?P<attendance>" + "|".join(re.escape(word) for word in _ATTENDANCE_INTENT) + ")"
+)
+
+
+def _mentions_attendance(query_lower: str) -> bool:
+    """True if a case-folded query uses an attendance word in any inflection"""
+    return _ATTENDANCE_STEM_RE.search(query_lower) is not None
+
+
+# Knowledge base trigger phrases -> candidate knowledge base keys
+_KB_KEYWORDS = MappingProxyType({
+    "apply leave": ("how_to_apply_leave", "leave_application"),
+    "download payslip": ("how_to_download_payslip",),
+    "get payslip": ("how_to_download_payslip",),
+    "mark attendance": ("how_to_mark_attendance",),
+    "work from home": ("work_from_home",),
+    "check in": ("attendance_marking",),
+    "attendance": ("attendance_marking",),
+    "leave": ("leave_application",),
+    "wfh": ("work_from_home",),
+    "salary": ("salary_info",),
+    "profile": ("profile_update",),
+    "update": ("profile_update",),
+    "holiday": ("holidays",),
+    "features": ("features",),
+    "what can you do": ("features",),
+    "meal": ("meal_booking",),
+    "food": ("meal_booking",),
+    "lunch": ("meal_booking",),
+    "dinner": ("meal_booking",),
+    "booking": ("meal_booking",),
+    "maternity": ("maternity_leave",),
+    "paternity": ("paternity_leave",),
+    "pregnancy": ("maternity_leave",),
+    "mother": ("maternity_leave",),
+    "father": ("paternity_leave",),
+    "baby": ("maternity_leave", "paternity_leave"),
+})
+
+# Longer phrases win over shorter ones (e.g. "apply leave" over "leave")
+_KB_KEYWORD_PRIORITY = {
+    keyword: rank
+    for rank, keyword in enumerate(sorted(_KB_KEYWORDS, key=len, reverse=True))
+}
+# Lookahead alternation reports overlapping matches in a single scan of the query
+_KB_KEYWORD_RE = re.compile(
+    "(?=(" + "|".join(re.escape(keyword) for keyword in _KB_KEYWORD_PRIORITY) + "))"
+)
+
+
+# Follow-up suggestions per knowledge base topic; shared tuples, never copied per call
+_DEFAULT_SUGGESTIONS = (
+    "How do I apply for leave?",
+    "Show my attendance",
+    "What is my leave balance?",
+    "Upcoming holidays",
+)
+_LEAVE_BALANCE_SUGGESTIONS = ("How to apply for leave?", "Company holiday list")
+_ATTENDANCE_STATS_SUGGESTIONS = ("Mark my attendance", "Attendance policy")
+_GENERAL_SUGGESTIONS = (
+    "How do I apply for leave?",
+    "Show my attendance for this month",
+    "What is my leave balance?",
+    "How to mark attendance?",
+)
+_LEAVE_SUGGESTIONS = (
+    "What is my leave balance?",
+    "When is the next holiday?",
+    "What is the Maternity Leave policy?",
+    "Work from home policy",
+)
+_ATTENDANCE_SUGGESTIONS = (
+    "Show my attendance for this month",
+    "Work from home policy",
+    "How do I apply for leave?",
+    "When is the next holiday?",
+)
+_SALARY_SUGGESTIONS = (
+    "How do I download my payslip?",
+    "Where can I see my salary?",
+    "What is my leave balance?",
+    "How do I update my profile?",
+)
+_PARENTAL_LEAVE_SUGGESTIONS = (
+    "What is the Maternity Leave policy?",
+    "What is the Paternity Leave policy?",
+    "How do I apply for leave?",
+    "What is my leave balance?",
+)
+_SUGGESTIONS_BY_TOPIC = {
+    "leave_application": _LEAVE_SUGGESTIONS,
+    "how_to_apply_leave": _LEAVE_SUGGESTIONS,
+    "attendance_marking": _ATTENDANCE_SUGGESTIONS,
+    "how_to_mark_attendance": _ATTENDANCE_SUGGESTIONS,
+    "work_from_home": (
+        "How to mark attendance?",
+        "How do I apply for leave?",
+        "Show my attendance for this month",
+        "What is my leave balance?",
+    ),
+    "salary_info": _SALARY_SUGGESTIONS,
+    "how_to_download_payslip": _SALARY_SUGGESTIONS,
+    "profile_update": (
+        "How do I download my payslip?",
+        "How do I apply for leave?",
+        "What features does this app have?",
+        "Show my attendance for this month",
+    ),
+    "holidays": (
+        "How do I apply for leave?",
+        "What is my leave balance?",
+        "Work from home policy",
+        "How do I book a meal?",
+    ),
+    "features": (
+        "How to mark attendance?",
+        "How do I apply for leave?",
+        "How do I book a meal?",
+        "How do I download my payslip?",
+    ),
+    "meal_booking": (
+        "When is the next holiday?",
+        "How to mark attendance?",
+        "What features does this app have?",
+        "Show my attendance for this month",
+    ),
+    "maternity_leave": _PARENTAL_LEAVE_SUGGESTIONS,
+    "paternity_leave": _PARENTAL_LEAVE_SUGGESTIONS,
+}
+
+
+def _build_knowledge_base() -> Dict:
+    """Build knowledge base with company policies and procedures"""
+    return {
+        "leave_application": {
+            "question": "How do I apply for leave?",
+            "answer": """To apply for leave, follow these steps:
 1. Log in to the attendance portal
 2. Navigate to 'Leave Management' section
 3. Click on 'Apply Leave'
@@ -58,14 +187,14 @@ Leave Types Available:
 - Sick Leave: {sick} days per year
 - Annual Leave: {annual} days per year
 """.format(
-                    casual=settings.MAX_CASUAL_LEAVE_DAYS,
-                    sick=settings.MAX_SICK_LEAVE_DAYS,
-                    annual=settings.MAX_ANNUAL_LEAVE_DAYS,
-                ),
-            },
-            "attendance_marking": {
-                "question": "How do I mark my attendance?",
-                "answer": """You can mark attendance using the Manual Method:
+                casual=settings.MAX_CASUAL_LEAVE_DAYS,
+                sick=settings.MAX_SICK_LEAVE_DAYS,
+                annual=settings.MAX_ANNUAL_LEAVE_DAYS,
+            ),
+        },
+        "attendance_marking": {
+            "question": "How do I mark my attendance?",
+            "answer": """You can mark attendance using the Manual Method:
 
 1. Log in to the portal
 2. Go to 'Attendance' section
@@ -79,15 +208,15 @@ Important Notes:
 - Late arrivals (after {late_threshold} minutes) will be marked
 - Auto check-out happens at {auto_checkout_time} if enabled
 """.format(
-                    start_time="9:00 AM",
-                    end_time="6:00 PM",
-                    late_threshold=settings.LATE_ARRIVAL_THRESHOLD_MINUTES,
-                    auto_checkout_time=settings.AUTO_CHECKOUT_TIME,
-                ),
-            },
-            "work_from_home": {
-                "question": "What is the work from home policy?",
-                "answer": """Work From Home (WFH) Policy:
+                start_time="9:00 AM",
+                end_time="6:00 PM",
+                late_threshold=settings.LATE_ARRIVAL_THRESHOLD_MINUTES,
+                auto_checkout_time=settings.AUTO_CHECKOUT_TIME,
+            ),
+        },
+        "work_from_home": {
+            "question": "What is the work from home policy?",
+            "answer": """Work From Home (WFH) Policy:
 
 1. **Eligibility**: All permanent employees after probation
 2. **Frequency**: Up to 2 days per week (subject to manager approval)
@@ -102,14 +231,14 @@ Important Notes:
    - Maintain regular communication
 5. **Attendance**: Mark WFH attendance through the portal
 """,
-            },
-            "salary_info": {
-                "question": "Where can I see my salary?",
-                "answer": "Please go to the **'My Salary'** section in the left sidebar. You will find your detailed net salary, breakdown, and payslips there.",
-            },
-            "profile_update": {
-                "question": "How do I update my personal information?",
-                "answer": """To update your personal information:
+        },
+        "salary_info": {
+            "question": "Where can I see my salary?",
+            "answer": "Please go to the **'My Salary'** section in the left sidebar. You will find your detailed net salary, breakdown, and payslips there.",
+        },
+        "profile_update": {
+            "question": "How do I update my personal information?",
+            "answer": """To update your personal information:
 
 1. Log in to the portal
 2. Go to 'My Profile'
@@ -128,10 +257,10 @@ Note: Some fields require HR approval for changes:
 
 For these, submit a request to HR with supporting documents.
 """,
-            },
-            "holidays": {
-                "question": "What are the upcoming holidays?",
-                "answer": """Holiday Calendar 2026:
+        },
+        "holidays": {
+            "question": "What are the upcoming holidays?",
+            "answer": """Holiday Calendar 2026:
 
 Public Holidays:
 - Republic Day: January 26
@@ -144,40 +273,40 @@ Public Holidays:
 
 Optional Holidays: 3 days (choose from the list in portal)
 """,
-            },
-            "features": {
-                "question": "What features does this app have?",
-                "answer": """Saigo Portal Features:
+        },
+        "features": {
+            "question": "What features does this app have?",
+            "answer": """Saigo Portal Features:
 1. **Smart Attendance**: Geo-fencing support with real-time tracking.
 2. **Leave Management**: Automated workflows and real-time balance tracking.
 3. **Payroll Hub**: One-click salary generation and instant payslip downloads.
 4. **Self-Service Portal**: Manage profile, documents, and view history.
 """,
-            },
-            "how_to_mark_attendance": {
-                "question": "How do I mark attendance?",
-                "answer": "To Mark Attendance: Go to the 'Dashboard' or 'Attendance' tab -> Click the large 'Check In' button. Ensure Location permissions are enabled in your browser.",
-            },
-            "how_to_download_payslip": {
-                "question": "How do I download my payslip?",
-                "answer": "To Download Payslip: Go to 'My Salary' section -> Select the desired Month & Year -> Click 'Download PDF'.",
-            },
-            "how_to_apply_leave": {
-                "question": "How do I apply for leave?",
-                "answer": "To Apply for Leave: Navigate to 'Leave Management' -> Click 'Apply Leave' -> Select Leave Type & Dates -> Submit.",
-            },
-            "meal_booking": {
-                "question": "How do I book a meal?",
-                "answer": """To Book a Meal:
+        },
+        "how_to_mark_attendance": {
+            "question": "How do I mark attendance?",
+            "answer": "To Mark Attendance: Go to the 'Dashboard' or 'Attendance' tab -> Click the large 'Check In' button. Ensure Location permissions are enabled in your browser.",
+        },
+        "how_to_download_payslip": {
+            "question": "How do I download my payslip?",
+            "answer": "To Download Payslip: Go to 'My Salary' section -> Select the desired Month & Year -> Click 'Download PDF'.",
+        },
+        "how_to_apply_leave": {
+            "question": "How do I apply for leave?",
+            "answer": "To Apply for Leave: Navigate to 'Leave Management' -> Click 'Apply Leave' -> Select Leave Type & Dates -> Submit.",
+        },
+        "meal_booking": {
+            "question": "How do I book a meal?",
+            "answer": """To Book a Meal:
 1. Navigate to the 'Meal Booking' section.
 2. View available working days.
 3. Select a date and choose meal type (Lunch/Dinner) and category (Veg/Non-Veg).
 4. Enter items and click 'Checkout & Book'.
 5. To Redeem: Show the QR code from the 'My Upcoming Meals' list to the canteen admin.""",
-            },
-            "maternity_leave": {
-                "question": "What is the Maternity Leave policy?",
-                "answer": """Maternity Leave Policy:
+        },
+        "maternity_leave": {
+            "question": "What is the Maternity Leave policy?",
+            "answer": """Maternity Leave Policy:
 
 1. **Eligibility**:
    - Permanent Female Employees: Must have worked for at least 80 days in the past 12 months.
@@ -196,10 +325,10 @@ Optional Holidays: 3 days (choose from the list in portal)
    - Go to 'Leave Management' -> 'Apply Leave' -> Select 'Maternity Leave'.
    - Upload the required medical documents.
 """,
-            },
-            "paternity_leave": {
-                "question": "What is the Paternity Leave policy?",
-                "answer": """Paternity Leave Policy:
+        },
+        "paternity_leave": {
+            "question": "What is the Paternity Leave policy?",
+            "answer": """Paternity Leave Policy:
 
 1. **Eligibility**:
    - Permanent Male Employees (probationers included).
@@ -216,208 +345,17 @@ Optional Holidays: 3 days (choose from the list in portal)
    - Notify manager at least 1 week in advance if possible.
    - Go to 'Leave Management' -> 'Apply Leave' -> Select 'Paternity Leave'.
 """,
-            },
-        }
-
-    async def get_response(
-        self,
-        query: str,
-        employee_id: str,
-        context: Optional[Dict] = None,
-    ) -> Dict:
-        """
-        Get application-level AI response based on internal data
-        """
-        try:
-            query_lower = query.lower()
-
-            employee = await Employee.find_one(Employee.employee_id == employee_id)
-
-            real_context = context or {}
-            if employee:
-                leave_data = {
-                    "casual": employee.casual_leave_balance,
-                    "sick": employee.sick_leave_balance,
-                    "annual": employee.annual_leave_balance,
-                }
-                real_context["leave_balance"] = leave_data
-
-                now = datetime.utcnow()
-                start_of_month = datetime(now.year, now.month, 1)
-
-                attendance_records = await Attendance.find(
-                    Attendance.employee_id == employee_id,
-                    Attendance.date >= start_of_month,
-                ).to_list(None)
-
-                total_days = len(attendance_records)
-                present = sum(
-                    1 for a in attendance_records if a.status in ["present", "half_day"]
-                )
-                late = sum(
-                    1 for a in attendance_records if getattr(a, "is_late", False)
-                )
-                absent = sum(1 for a in attendance_records if a.status == "absent")
-
-                recent_checkin = "N/A"
-                if attendance_records:
-                    sorted_records = sorted(
-                        attendance_records,
-                        key=lambda x: getattr(x, "date", datetime.min),
-                        reverse=True,
-                    )
-                    latest = sorted_records[0]
-                    if getattr(latest, "check_in_time", None):
-                        recent_checkin = latest.check_in_time.strftime("%H:%M")
-
-                attendance_summary = {
-                    "month": now.strftime("%B %Y"),
-                    "total_recorded_days": total_days,
-                    "present_days": present,
-                    "late_arrivals": late,
-                    "absences": absent,
-                    "recent_checkin": recent_checkin,
-                }
-                real_context["attendance_stats"] = attendance_summary
-
-            if any(word in query_lower for word in ["leave balance", "how many leaves", "my leaves"]):
-                if employee:
-                    answer = f"Hello {employee.first_name}! Based on your records:\n"
-                    answer += f"🏖️ Casual Leave: {employee.casual_leave_balance} remaining\n"
-                    answer += f"🤒 Sick Leave: {employee.sick_leave_balance} remaining\n"
-                    answer += f"📅 Annual Leave: {employee.annual_leave_balance} remaining\n"
-                    return {
-                        "answer": answer,
-                        "source": "app_logic",
-                        "suggestions": ["How to apply for leave?", "Company holiday list"],
-                    }
-
-            if any(word in query_lower for word in ["attendance", "present", "check in time", "my progress"]):
-                stats = real_context.get("attendance_stats", {})
-                answer = f"Attendance Progress for {stats.get('month', 'Month')}:\n"
-                answer += f"✅ Present: {stats.get('present_days', 0)} days\n"
-                answer += f"⏰ Late Arrivals: {stats.get('late_arrivals', 0)}\n"
-                answer += f"📉 Absences: {stats.get('absences', 0)}\n"
-                if stats.get("recent_checkin") != "N/A":
-                    answer += f"ℹ️ Most recent check-in: {stats.get('recent_checkin')}"
-
-                return {
-                    "answer": answer,
-                    "source": "app_logic",
-                    "suggestions": ["Mark my attendance", "Attendance policy"],
-                }
-
-            kb_response = self._check_knowledge_base(query)
-            if kb_response:
-                return {
-                    "answer": kb_response,
-                    "source": "knowledge_base",
-                    "suggestions": self._get_suggestions(query),
-                }
-
-            if self.use_ai:
-                return await self._get_ai_response(query, employee_id, real_context)
-
-            return {
-                "answer": "I'm not quite sure about that. I specialize in your Attendance, Leaves, and Company Policies. Could you try asking about those?",
-                "source": "fallback",
-                "suggestions": self._get_default_suggestions(),
-            }
-
-        except Exception as e:
-            print(f"Chatbot Critical Error: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return {
-                "answer": f"I encountered a system error while processing your request. (Error: {str(e)})",
-                "source": "error",
-                "suggestions": self._get_default_suggestions(),
-            }
-
-    def _check_knowledge_base(self, query: str) -> Optional[str]:
-        """Check if query matches knowledge base"""
-        query_lower = query.lower()
-
-        keywords = {
-            "apply leave": ["how_to_apply_leave", "leave_application"],
-            "download payslip": ["how_to_download_payslip"],
-            "get payslip": ["how_to_download_payslip"],
-            "mark attendance": ["how_to_mark_attendance"],
-            "work from home": ["work_from_home"],
-            "check in": ["attendance_marking"],
-            "attendance": ["attendance_marking"],
-            "leave": ["leave_application"],
-            "wfh": ["work_from_home"],
-            "salary": ["salary_info"],
-            "profile": ["profile_update"],
-            "update": ["profile_update"],
-            "holiday": ["holidays"],
-            "features": ["features"],
-            "what can you do": ["features"],
-            "meal": ["meal_booking"],
-            "food": ["meal_booking"],
-            "lunch": ["meal_booking"],
-            "dinner": ["meal_booking"],
-            "booking": ["meal_booking"],
-            "maternity": ["maternity_leave"],
-            "paternity": ["paternity_leave"],
-            "pregnancy": ["maternity_leave"],
-            "mother": ["maternity_leave"],
-            "father": ["paternity_leave"],
-            "baby": ["maternity_leave", "paternity_leave"],
-        }
-
-        for keyword in sorted(keywords.keys(), key=len, reverse=True):
-            if keyword in query_lower:
-                for kb_key in keywords[keyword]:
-                    if kb_key in self.knowledge_base:
-                        return self.knowledge_base[kb_key]["answer"]
-
-        return None
-
-    async def _get_ai_response(
-        self,
-        query: str,
-        employee_id: str,
-        context: Optional[Dict] = None,
-    ) -> Dict:
-        """Get AI-powered response using OpenAI"""
-        try:
-            system_prompt = self._build_system_prompt(employee_id, context)
-
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": query},
-                ],
-                temperature=settings.OPENAI_TEMPERATURE,
-                max_tokens=settings.OPENAI_MAX_TOKENS,
-            )
+        },
+    }
 
-            answer = response.choices[0].message.content
 
-            return {
-                "answer": answer,
-                "source": "ai",
-                "suggestions": self._get_suggestions(query),
-            }
+# Derived only from settings, so built once at import
+_KNOWLEDGE_BASE = MappingProxyType(_build_knowledge_base())
 
-        except Exception as e:
-            print(f"AI response error: {e}")
-            return {
-                "answer": f"System Error: {str(e)}. Please check API Key configuration.",
-                "source": "error",
-                "suggestions": self._get_default_suggestions(),
-            }
 
-    def _build_system_prompt(
-        self,
-        employee_id: str,
-        context: Optional[Dict] = None,
-    ) -> str:
-        """Build system prompt with company context"""
-        prompt = f"""You are an intelligent AI Assistant for 'Saigo Portal', developed by 'Saigo'.
+# Static part of the chatbot system prompt. Kept byte-identical across calls so the
+# provider's prompt-prefix cache can reuse it; per-user context goes in a second message.
+_SYSTEM_PROMPT_HEADER = """You are an intelligent AI Assistant for 'Saigo Portal', developed by 'Saigo'.
 Our company (Saigo) offers this Employee Management Portal to third-party companies.
 
 PRODUCT SUMMARY:
@@ -446,24 +384,9 @@ HOW-TO STEPS:
 - Book Meal: Go to Meal Booking -> Select Date -> Choose Type -> Book.
 - Get Payslip: Go to My Salary -> Select Month -> Download.
 - Update Profile: Click Avatar -> Profile -> Edit.
-
-User Identity (INTERNAL ONLY - DO NOT REVEAL IN CHAT):
-- Role: {'Admin' if context and context.get('type') == 'admin_reports' else 'Employee'}
 """
 
-        if context:
-            if context.get("type") == "admin_reports":
-                prompt += "\nADMIN REPORT MODE: You are analyzing company-wide data. You may summarize trends but DO NOT leak individual sensitive data unless necessary for the report.\n"
-                if "all_stats" in context:
-                    prompt += f"\nCompany Data Snapshot:\n{json.dumps(context['all_stats'], indent=2)}\n"
-
-            if "attendance_stats" in context:
-                prompt += f"\nYour Attendance Stats:\n{json.dumps(context['attendance_stats'], indent=2)}\n"
-
-            if "leave_balance" in context:
-                prompt += f"\nYour Leave Balance:\n{json.dumps(context['leave_balance'], indent=2)}\n"
-
-        prompt += """
+_SYSTEM_PROMPT_FOOTER = """
 ROLE: Attendance Pro Assistant
 
 You are strictly an assistant for the "Attendance Pro" portal.
@@ -505,32 +428,604 @@ ADMIN REPORT MODE (Role = Admin)
 - Keep responses concise, professional, data-driven.
 """
 
-        return prompt
+_STATIC_SYSTEM_PROMPT = _SYSTEM_PROMPT_HEADER + _SYSTEM_PROMPT_FOOTER
 
-    def _get_suggestions(self, query: str) -> List[str]:
-        """Get related suggestions based on query"""
-        all_suggestions = [
-            "How do I apply for leave?",
-            "Show my attendance for this month",
-            "What is my leave balance?",
-            "How to mark attendance?",
-            "When is the next holiday?",
-            "Work from home policy",
-            "How to update my profile?",
-            "How do I book a meal?",
-            "When is salary day?",
-        ]
-        return all_suggestions[:4]
 
-    def _get_default_suggestions(self) -> List[str]:
-        """Get default suggestions"""
+def _prompt_json(data) -> str:
+    """Compact, key-sorted JSON so equal context renders to an equal prompt"""
+    return orjson.dumps(data, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+
+
+@lru_cache(maxsize=256)
+def _render_system_context(
+    admin_mode: bool,
+    all_stats_json: Optional[str],
+    attendance_json: Optional[str],
+    leave_json: Optional[str],
+) -> str:
+    """Assemble the per-user system message from the role and serialized context"""
+    prompt = "User Identity (INTERNAL ONLY - DO NOT REVEAL IN CHAT):\n"
+    prompt += f"- Role: {'Admin' if admin_mode else 'Employee'}\n"
+
+    if admin_mode:
+        prompt += "\nADMIN REPORT MODE: You are analyzing company-wide data. You may summarize trends but DO NOT leak individual sensitive data unless necessary for the report.\n"
+        if all_stats_json is not None:
+            prompt += f"\nCompany Data Snapshot:\n{all_stats_json}\n"
+
+    if attendance_json is not None:
+        prompt += f"\nYour Attendance Stats:\n{attendance_json}\n"
+
+    if leave_json is not None:
+        prompt += f"\nYour Leave Balance:\n{leave_json}\n"
+
+    return prompt
+
+
+# Official letter prompt templates, read once at import
+_LETTER_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates", "letters")
+
+
+def _load_letter_template(name: str) -> str:
+    """Read a letter prompt template from file"""
+    with open(os.path.join(_LETTER_TEMPLATE_DIR, f"{name}.txt"), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+_LETTER_PROMPT = _load_letter_template("prompt")
+_LETTER_PDF_REFERENCE = _load_letter_template("pdf_reference")
+# Characters of an uploaded reference PDF's text passed to the LLM
+_PDF_EXCERPT_CHARS = 4000
+_LETTER_STRUCTURES = MappingProxyType({
+    doc_type: _load_letter_template(doc_type)
+    for doc_type in ("offer_letter", "experience_letter", "salary_revision", "default")
+})
+
+def _strip_code_fence(text: str) -> str:
+    """Drop a markdown code fence wrapped around LLM output"""
+    text = text.strip().removeprefix("```html").removeprefix("```")
+    return text.removesuffix("```").strip()
+
+
+# Salary amounts: drop digit-group separators, then take the first number
+_AMOUNT_SEPARATOR_RE = re.compile(r"[,\s]")
+_AMOUNT_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def _parse_amount(value) -> float:
+    """Parse a salary amount like '1,20,000' or 'Rs. 5000.50'; unparseable amounts count as 0"""
+    match = _AMOUNT_RE.search(_AMOUNT_SEPARATOR_RE.sub("", str(value)))
+    return float(match.group()) if match else 0.0
+
+
+# The LLM writes only the letter body; this container, the letterhead, salary table
+# and signature are assembled around it
+_LETTER_SHELL_OPEN = "<div style=\"padding: 40px; border: 1px solid #ddd; background: white; font-family: 'Times New Roman', serif;\">"
+_LETTER_SHELL_CLOSE = "</div>"
+_LETTER_MAX_TOKENS = 1500
+
+# Salary breakdown table fragments
+_SALARY_TABLE_HEAD = (
+    "<table style='width:100%; border-collapse: collapse; margin: 20px 0; border: 1px solid #000;'>"
+    "<tr style='background:#f0f0f0;'>"
+    "<th style='border:1px solid #000; padding:8px;'>Category</th>"
+    "<th style='border:1px solid #000; padding:8px; text-align:right;'>Amount (INR)</th>"
+    "</tr>"
+)
+_SALARY_TABLE_ROW = (
+    "<tr>"
+    "<td style='border:1px solid #000; padding:8px;'>{category}</td>"
+    "<td style='border:1px solid #000; padding:8px; text-align:right;'>{amount}</td>"
+    "</tr>"
+)
+_SALARY_TABLE_TOTAL = (
+    "<tr style='font-weight:bold;'>"
+    "<td style='border:1px solid #000; padding:8px;'>TOTAL</td>"
+    "<td style='border:1px solid #000; padding:8px; text-align:right;'>{total:,.2f}</td>"
+    "</tr>"
+    "</table>"
+)
+
+
+class ChatbotService:
+    """AI-powered chatbot for employee assistance"""
+
+    _instance = None
+
+    def __new__(cls):
+        # Shared instance so the LLM client and its connection pool are never duplicated
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        """Initialize chatbot service"""
+        if getattr(self, "_initialized", False):
+            return
+
+        self._http = None
+        if getattr(settings, "GROQ_API_KEY", ""):
+            self.use_ai = True
+            self._http = self._build_http_client()
+            self.client = AsyncOpenAI(
+                api_key=settings.GROQ_API_KEY,
+                base_url="https://api.groq.com/openai/v1",
+                http_client=self._http,
+            )
+            self.model = settings.GROQ_MODEL
+        elif settings.OPENAI_API_KEY:
+            self.use_ai = True
+            self._http = self._build_http_client()
+            self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, http_client=self._http)
+            self.model = settings.OPENAI_MODEL
+        else:
+            self.use_ai = False
+            self.client = None
+            self.model = None
+
+        self.knowledge_base = self._build_knowledge_base()
+        self.exact_cache = TTLCache(
+            max_entries=settings.LLM_EXACT_CACHE_SIZE,
+            ttl_seconds=settings.LLM_EXACT_CACHE_TTL_SECONDS,
+        )
+        self.semantic_cache = SemanticCache(
+            threshold=settings.LLM_SEMANTIC_CACHE_THRESHOLD,
+            max_entries=settings.LLM_SEMANTIC_CACHE_SIZE,
+            ttl_seconds=settings.LLM_SEMANTIC_CACHE_TTL_SECONDS,
+            max_entries_per_scope=settings.LLM_SEMANTIC_CACHE_SCOPE_SIZE,
+        )
+        # Exact cache key -> answer future of the LLM call currently in flight for it
+        self._pending_answers: Dict[str, asyncio.Future] = {}
+        self._initialized = True
+
+    @staticmethod
+    def _build_http_client() -> httpx.AsyncClient:
+        """Pooled HTTP client shared by every LLM call so bursts don't queue on the default pool"""
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(
+                settings.LLM_TIMEOUT_SECONDS,
+                connect=settings.LLM_CONNECT_TIMEOUT_SECONDS,
+            ),
+            # Multiplexes concurrent completions over the same TLS connections
+            http2=settings.LLM_HTTP2,
+        )
+
+    async def warmup(self):
+        """Complete the TLS/HTTP2 handshake with the LLM endpoint ahead of the first user query"""
+        if self._http is None:
+            return
+
+        # One request is enough: with HTTP/2 every later completion multiplexes over this connection
+        url = f"{str(self.client.base_url).rstrip('/')}/models"
+        try:
+            await self._http.head(url, timeout=5.0)
+        except Exception as e:
+            logger.warning("LLM connection warmup failed: %s", e)
+            return
+        logger.info("Warmed LLM connection")
+
+    async def close(self):
+        """Release pooled LLM connections"""
+        if self._http is not None:
+            await self._http.aclose()
+
+    def _build_knowledge_base(self) -> Mapping:
+        """Return the shared knowledge base (built once from settings)"""
+        return _KNOWLEDGE_BASE
+
+    async def get_response(
+        self,
+        query: str,
+        employee_id: str,
+        context: Optional[Dict] = None,
+    ) -> Dict:
+        """
+        Get application-level AI response based on internal data
+        """
+        try:
+            response, real_context = await self._route(query, employee_id, context)
+            if response is None:
+                return await self._get_ai_response(query, employee_id, real_context)
+            return response
+
+        except Exception as e:
+            logger.exception("Chatbot critical error: %s", e)
+            return {
+                "answer": f"I encountered a system error while processing your request. (Error: {str(e)})",
+                "source": "error",
+                "suggestions": self._get_default_suggestions(),
+            }
+
+    async def stream_response(
+        self,
+        query: str,
+        employee_id: str,
+        context: Optional[Dict] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Yield the answer as it is produced.
+        Only LLM answers arrive in several chunks; app logic and knowledge base
+        answers are yielded whole.
+        """
+        try:
+            response, real_context = await self._route(query, employee_id, context)
+        except Exception as e:
+            logger.exception("Chatbot critical error: %s", e)
+            yield f"I encountered a system error while processing your request. (Error: {str(e)})"
+            return
+
+        if response is not None:
+            yield response["answer"]
+            return
+
+        async for chunk in self._stream_ai_response(query, employee_id, real_context):
+            yield chunk
+
+    async def _route(
+        self,
+        query: str,
+        employee_id: str,
+        context: Optional[Dict] = None,
+    ) -> Tuple[Optional[Dict], Dict]:
+        """
+        Answer from app logic or the knowledge base when possible.
+        Returns (response, context); response is None when the LLM should answer.
+        """
+        query_lower = query.casefold()
+
+        intents = {match.lastgroup for match in _INTENT_RE.finditer(query_lower)}
+        wants_leave_balance = "leave" in intents
+        wants_attendance = "attendance" in intents or _mentions_attendance(query_lower)
+        needs_personal = wants_leave_balance or wants_attendance
+
+        now = datetime.utcnow()
+
+        # Start the user-data lookup only if a knowledge base miss would need it.
+        # The knowledge base match is synchronous, so on a hit the task is cancelled
+        # before it ever runs and no query reaches MongoDB.
+        records_task = None
+        if needs_personal or self.use_ai:
+            records_task = asyncio.create_task(self._fetch_personal_records(employee_id, now))
+
+        # Knowledge base answers need no user state, so try them before touching the DB
+        if not needs_personal:
+            kb_key = self._match_knowledge_base(query_lower)
+            if kb_key:
+                if records_task:
+                    records_task.cancel()
+                return {
+                    "answer": self.knowledge_base[kb_key]["answer"],
+                    "source": "knowledge_base",
+                    "suggestions": self._get_suggestions(query, kb_key),
+                }, context or {}
+            if not self.use_ai:
+                return self._fallback_response(), context or {}
+
+        employee, month_totals = await records_task
+
+        real_context = context or {}
+        if employee:
+            leave_data = {
+                "casual": employee.casual_leave_balance,
+                "sick": employee.sick_leave_balance,
+                "annual": employee.annual_leave_balance,
+            }
+            real_context["leave_balance"] = leave_data
+
+            totals = month_totals[0] if month_totals else {}
+
+            recent_checkin = "N/A"
+            if totals.get("recent_checkin"):
+                recent_checkin = totals["recent_checkin"].strftime("%H:%M")
+
+            attendance_summary = {
+                "month": now.strftime("%B %Y"),
+                "total_recorded_days": totals.get("total", 0),
+                "present_days": totals.get("present", 0),
+                "late_arrivals": totals.get("late", 0),
+                "absences": totals.get("absent", 0),
+                "recent_checkin": recent_checkin,
+            }
+            real_context["attendance_stats"] = attendance_summary
+
+        if wants_leave_balance:
+            if employee:
+                answer = f"Hello {employee.first_name}! Based on your records:\n"
+                answer += f"🏖️ Casual Leave: {employee.casual_leave_balance} remaining\n"
+                answer += f"🤒 Sick Leave: {employee.sick_leave_balance} remaining\n"
+                answer += f"📅 Annual Leave: {employee.annual_leave_balance} remaining\n"
+                return {
+                    "answer": answer,
+                    "source": "app_logic",
+                    "suggestions": _LEAVE_BALANCE_SUGGESTIONS,
+                }, real_context
+
+        if wants_attendance:
+            stats = real_context.get("attendance_stats", {})
+            answer = f"Attendance Progress for {stats.get('month', 'Month')}:\n"
+            answer += f"✅ Present: {stats.get('present_days', 0)} days\n"
+            answer += f"⏰ Late Arrivals: {stats.get('late_arrivals', 0)}\n"
+            answer += f"📉 Absences: {stats.get('absences', 0)}\n"
+            if stats.get("recent_checkin") != "N/A":
+                answer += f"ℹ️ Most recent check-in: {stats.get('recent_checkin')}"
+
+            return {
+                "answer": answer,
+                "source": "app_logic",
+                "suggestions": _ATTENDANCE_STATS_SUGGESTIONS,
+            }, real_context
+
+        if needs_personal:
+            kb_key = self._match_knowledge_base(query_lower)
+            if kb_key:
+                return {
+                    "answer": self.knowledge_base[kb_key]["answer"],
+                    "source": "knowledge_base",
+                    "suggestions": self._get_suggestions(query, kb_key),
+                }, real_context
+
+        if self.use_ai:
+            return None, real_context
+
+        return self._fallback_response(), real_context
+
+    async def _fetch_personal_records(self, employee_id: str, now: datetime) -> Tuple:
+        """Fetch the employee and this month's attendance totals concurrently"""
+        start_of_month = datetime(now.year, now.month, 1)
+        month_filter = {"employee_id": employee_id, "date": {"$gte": start_of_month}}
+
+        # All lookups are independent, so overlap their round-trips
+        return await asyncio.gather(
+            Employee.find_one(Employee.employee_id == employee_id).project(EmployeeLeaveView),
+            Attendance.aggregate(
+                [
+                    {"$match": month_filter},
+                    {
+                        "$group": {
+                            "_id": None,
+                            "total": {"$sum": 1},
+                            "present": {
+                                "$sum": {"$cond": [{"$in": ["$status", ["present", "half_day"]]}, 1, 0]}
+                            },
+                            "late": {"$sum": {"$cond": ["$is_late", 1, 0]}},
+                            "absent": {"$sum": {"$cond": [{"$eq": ["$status", "absent"]}, 1, 0]}},
+                            "recent_checkin": {"$max": "$check_in_time"},
+                        }
+                    },
+                ]
+            ).to_list(),
+        )
+
+    def _fallback_response(self) -> Dict:
+        """Response used when neither app logic nor the knowledge base can answer"""
+        return {
+            "answer": "I'm not quite sure about that. I specialize in your Attendance, Leaves, and Company Policies. Could you try asking about those?",
+            "source": "fallback",
+            "suggestions": self._get_default_suggestions(),
+        }
+
+    def _match_knowledge_base(self, query_lower: str) -> Optional[str]:
+        """Return the knowledge base key matching an already case-folded query"""
+        best = None
+        for match in _KB_KEYWORD_RE.finditer(query_lower):
+            keyword = match.group(1)
+            if best is None or _KB_KEYWORD_PRIORITY[keyword] < _KB_KEYWORD_PRIORITY[best]:
+                best = keyword
+
+        if best:
+            for kb_key in _KB_KEYWORDS[best]:
+                if kb_key in self.knowledge_base:
+                    return kb_key
+
+        return None
+
+    async def _get_ai_response(
+        self,
+        query: str,
+        employee_id: str,
+        context: Optional[Dict] = None,
+    ) -> Dict:
+        """Get AI-powered response using OpenAI"""
+        query = self._truncate_query(query)
+        try:
+            system_context = self._build_system_context(employee_id, context)
+
+            use_cache = self._is_cacheable(context)
+            if use_cache:
+                cached_answer = self._get_cached_answer(system_context, query)
+                if cached_answer is not None:
+                    return {
+                        "answer": cached_answer,
+                        "source": "ai",
+                        "suggestions": self._get_suggestions(query),
+                    }
+
+            if use_cache:
+                answer = await self._complete_once(system_context, query)
+            else:
+                answer = await self._complete(system_context, query)
+
+            return {
+                "answer": answer,
+                "source": "ai",
+                "suggestions": self._get_suggestions(query),
+            }
+
+        except Exception as e:
+            logger.exception("AI response error: %s", e)
+            return {
+                "answer": f"System Error: {str(e)}. Please check API Key configuration.",
+                "source": "error",
+                "suggestions": self._get_default_suggestions(),
+            }
+
+    async def _complete(self, system_context: str, query: str) -> Optional[str]:
+        """Run a single chat completion and return its text"""
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=self._build_messages(system_context, query),
+            temperature=settings.OPENAI_TEMPERATURE,
+            max_tokens=settings.OPENAI_MAX_TOKENS,
+        )
+        usage = response.usage
+        details = getattr(usage, "prompt_tokens_details", None) if usage else None
+        if details is not None and details.cached_tokens is not None:
+            logger.debug("LLM prompt tokens: %d (%d cached)", usage.prompt_tokens, details.cached_tokens)
+        return response.choices[0].message.content
+
+    async def _complete_once(self, system_context: str, query: str) -> Optional[str]:
+        """
+        Complete and cache, sharing one upstream call between identical concurrent
+        prompts so a burst of cache misses doesn't stampede the LLM.
+        """
+        cache_key = self._exact_cache_key(system_context, query)
+        pending = self._pending_answers.get(cache_key)
+        if pending is not None:
+            answer = await asyncio.shield(pending)
+            if answer:
+                return answer
+            # The shared call failed; fall through and try on our own
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending_answers[cache_key] = future
+        answer = None
+        try:
+            answer = await self._complete(system_context, query)
+            if answer:
+                self._cache_answer(system_context, query, answer)
+            return answer
+        finally:
+            future.set_result(answer)
+            if self._pending_answers.get(cache_key) is future:
+                del self._pending_answers[cache_key]
+
+    async def _stream_ai_response(
+        self,
+        query: str,
+        employee_id: str,
+        context: Optional[Dict] = None,
+    ) -> AsyncIterator[str]:
+        """Stream AI-powered response deltas using OpenAI"""
+        query = self._truncate_query(query)
+        try:
+            system_context = self._build_system_context(employee_id, context)
+
+            use_cache = self._is_cacheable(context)
+            if use_cache:
+                cached_answer = self._get_cached_answer(system_context, query)
+                if cached_answer is not None:
+                    yield cached_answer
+                    return
+
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=self._build_messages(system_context, query),
+                temperature=settings.OPENAI_TEMPERATURE,
+                max_tokens=settings.OPENAI_MAX_TOKENS,
+                stream=True,
+            )
+
+            parts = []
+            try:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+            finally:
+                # Stops generation upstream if the client disconnected mid-answer
+                await stream.close()
+
+            answer = "".join(parts)
+            if use_cache and answer:
+                self._cache_answer(system_context, query, answer)
+
+        except Exception as e:
+            logger.exception("AI response error: %s", e)
+            yield f"System Error: {str(e)}. Please check API Key configuration."
+
+    def _truncate_query(self, query: str) -> str:
+        """Cap the user query so oversized pastes don't inflate LLM cost and latency"""
+        limit = settings.OPENAI_MAX_INPUT_CHARS
+        if len(query) > limit:
+            logger.info("Truncating chatbot query from %d to %d characters", len(query), limit)
+            return query[:limit]
+        return query
+
+    def _is_cacheable(self, context: Optional[Dict]) -> bool:
+        """Admin reports are built from live company stats, so never serve them from cache"""
+        return settings.LLM_CACHE_ENABLED and not (
+            context and context.get("type") == "admin_reports"
+        )
+
+    def _get_cached_answer(self, system_context: str, query: str) -> Optional[str]:
+        """Exact-match lookup first, then the semantic cache"""
+        cached_answer = self.exact_cache.get(self._exact_cache_key(system_context, query))
+        if cached_answer is None:
+            cached_answer = self.semantic_cache.get(self._cache_scope(system_context), query)
+        return cached_answer
+
+    def _cache_answer(self, system_context: str, query: str, answer: str) -> None:
+        """Store an LLM answer in both cache layers"""
+        self.exact_cache.set(self._exact_cache_key(system_context, query), answer)
+        self.semantic_cache.set(self._cache_scope(system_context), query, answer)
+
+    def _cache_scope(self, system_context: str) -> str:
+        """Cache partition for a model + system context pair"""
+        return hashlib.sha256(f"{self.model}\n{system_context}".encode("utf-8")).hexdigest()
+
+    def _exact_cache_key(self, system_context: str, query: str) -> str:
+        """Deterministic hash of everything that shapes the LLM completion"""
+        payload = orjson.dumps(
+            {
+                "m": self.model,
+                "t": settings.OPENAI_TEMPERATURE,
+                "sp": system_context,
+                # Case and whitespace don't change the answer, so they shouldn't split the cache
+                "q": " ".join(query.casefold().split()),
+            },
+            option=orjson.OPT_SORT_KEYS,
+        )
+        return hashlib.sha256(payload).hexdigest()
+
+    def _build_messages(self, system_context: str, query: str) -> List[Dict[str, str]]:
+        """Static system prompt first so every request shares the same cacheable prefix"""
         return [
-            "How do I apply for leave?",
-            "Show my attendance",
-            "What is my leave balance?",
-            "Upcoming holidays",
+            {"role": "system", "content": _STATIC_SYSTEM_PROMPT},
+            {"role": "system", "content": system_context},
+            {"role": "user", "content": query},
         ]
 
+    def _build_system_context(
+        self,
+        employee_id: str,
+        context: Optional[Dict] = None,
+    ) -> str:
+        """Build the per-user system message with company context"""
+        context = context or {}
+        admin_mode = context.get("type") == "admin_reports"
+        return _render_system_context(
+            admin_mode,
+            _prompt_json(context["all_stats"]) if admin_mode and "all_stats" in context else None,
+            _prompt_json(context["attendance_stats"]) if "attendance_stats" in context else None,
+            _prompt_json(context["leave_balance"]) if "leave_balance" in context else None,
+        )
+
+    def _get_suggestions(self, query: str, kb_key: Optional[str] = None) -> Tuple[str, ...]:
+        """Get related suggestions based on query"""
+        if kb_key is None:
+            kb_key = self._match_knowledge_base(query.casefold())
+        return _SUGGESTIONS_BY_TOPIC.get(kb_key, _GENERAL_SUGGESTIONS)
+
+    def _get_default_suggestions(self) -> Tuple[str, ...]:
+        """Get default suggestions"""
+        return _DEFAULT_SUGGESTIONS
+
     async def get_attendance_info(
         self,
         employee_id: str,
@@ -553,7 +1048,7 @@ ADMIN REPORT MODE (Role = Admin)
             "annual": 15,
         }
 
-    async def generate_official_letter(
+    def _prepare_letter(
         self,
         doc_type: str,
         employee: Employee,
@@ -564,8 +1059,8 @@ ADMIN REPORT MODE (Role = Admin)
         company_name: str = "My Company",
         company_logo: Optional[str] = None,
         hr_signature: Optional[str] = None,
-    ) -> str:
-        """Generate official HR letters using LLM"""
+    ) -> Tuple[List[Dict], str, str]:
+        """Build the LLM messages for an official HR letter, plus the fixed HTML around its body"""
 
         current_date = datetime.now().strftime("%B %d, %Y")
 
@@ -599,163 +1094,54 @@ ADMIN REPORT MODE (Role = Admin)
                 f"</div>"
             )
 
-        if doc_type == "offer_letter":
-            doc_structure = """
-2. Title: OFFER LETTER
-3. Date: Top Right
-4. Salutation: Dear [Name]
-5. Body:
-   - Opening: We are pleased to invite you...
-   - Role Confirmation
-   - Salary / CTC details
-   - Terms: Probation, Leave, etc.
-6. Closing: We look forward to...
-"""
-        elif doc_type == "experience_letter":
-            doc_structure = """
-2. Title: TO WHOM IT MAY CONCERN / EXPERIENCE CERTIFICATE
-3. Date: Top Right
-4. Body:
-   - Employment confirmation
-   - Tenure
-   - Role description
-   - Performance statement
-   - Standing and dedication
-6. Closing: We wish him/her all the best...
-"""
-        elif doc_type == "salary_revision":
-            doc_structure = """
-2. Title: SALARY REVISION LETTER
-3. Date: Top Right
-4. Salutation: Dear [Name]
-5. Body:
-   - Salary revision announcement
-   - Effective date
-   - New CTC / salary details
-   - Appreciation note
-6. Closing: We look forward to your continued contribution...
-"""
-        else:
-            doc_structure = """
-2. Title: OFFICIAL LETTER
-3. Date: Top Right
-4. Salutation: Dear [Name]
-5. Body: Use the custom HR instructions
-6. Closing: Professional closing
-"""
-
-        prompt = f"""
-You are an expert HR Manager at '{company_name}'.
-Your task is to write a professional, legally-sound, and formatted Official Letter.
-
-DETAILS:
-- Document Type: {doc_type.replace('_', ' ').title()}
-- Date: {current_date}
-- COMPANY NAME: {company_name} (See Override Rule below)
-- Employee Name: {employee.first_name} {employee.last_name}
-- Employee ID: {employee.employee_id}
-- Designation: {employee.designation}
-- Department: {employee.department}
-- Joining Date: {employee.joining_date}
-
-CUSTOM INSTRUCTIONS FROM HR:
-{custom_instructions}
-
-CRITICAL NAMING RULE:
-If the custom instructions explicitly mention a different company name, use that name throughout the document instead of '{company_name}'.
-
-HTML STYLE GUIDE:
-- Use a professional font (font-family: 'Times New Roman', serif) for the body.
-- Use <br> for spacing.
-- Use <p style='text-align: justify;'> for body paragraphs.
-- Wrap the entire content in a <div style="padding: 40px; border: 1px solid #ddd; background: white;">.
-
-MANDATORY HEADER:
-{header_html}
-
-CONTENT STRUCTURE:
-1. Insert HEADER code exactly as provided.
-
-{doc_structure}
-
-7. Insert FOOTER code exactly as provided.
-
-MANDATORY FOOTER:
-{footer_html}
-"""
-
+        doc_structure = _LETTER_STRUCTURES.get(doc_type, _LETTER_STRUCTURES["default"])
+        # Single pass: values containing braces are inserted verbatim, never re-parsed
+        prompt = _LETTER_PROMPT.format(
+            company_name=company_name,
+            doc_title=doc_type.replace("_", " ").title(),
+            current_date=current_date,
+            first_name=employee.first_name,
+            last_name=employee.last_name,
+            employee_id=employee.employee_id,
+            designation=employee.designation,
+            department=employee.department,
+            joining_date=employee.joining_date,
+            custom_instructions=custom_instructions,
+            doc_structure=doc_structure,
+        )
+
+        table_html = ""
         if salary_breakdown_json:
             try:
                 salary_data = json.loads(salary_breakdown_json)
                 if isinstance(salary_data, list) and len(salary_data) > 0:
-                    table_html = "<table style='width:100%; border-collapse: collapse; margin: 20px 0; border: 1px solid #000;'>"
-                    table_html += (
-                        "<tr style='background:#f0f0f0;'>"
-                        "<th style='border:1px solid #000; padding:8px;'>Category</th>"
-                        "<th style='border:1px solid #000; padding:8px; text-align:right;'>Amount (INR)</th>"
-                        "</tr>"
-                    )
-                    total = 0.0
-
-                    for row in salary_data:
-                        amount = row.get("amount", "0")
-                        try:
-                            clean_amt = float(str(amount).replace(",", "").replace(" ", ""))
-                            total += clean_amt
-                        except Exception:
-                            pass
-
-                        table_html += (
-                            f"<tr>"
-                            f"<td style='border:1px solid #000; padding:8px;'>{row.get('category')}</td>"
-                            f"<td style='border:1px solid #000; padding:8px; text-align:right;'>{amount}</td>"
-                            f"</tr>"
+                    total = sum(_parse_amount(row.get("amount", "0")) for row in salary_data)
+                    rows = "".join(
+                        _SALARY_TABLE_ROW.format(
+                            category=html.escape(str(row.get("category"))),
+                            amount=html.escape(str(row.get("amount", "0"))),
                         )
-
-                    table_html += (
-                        f"<tr style='font-weight:bold;'>"
-                        f"<td style='border:1px solid #000; padding:8px;'>TOTAL</td>"
-                        f"<td style='border:1px solid #000; padding:8px; text-align:right;'>{total:,.2f}</td>"
-                        f"</tr>"
+                        for row in salary_data
                     )
-                    table_html += "</table>"
+                    table_html = _SALARY_TABLE_HEAD + rows + _SALARY_TABLE_TOTAL.format(total=total)
 
-                    prompt += f"""
+                    prompt += """
 
-MANDATORY SALARY BREAKDOWN TABLE:
-Please insert the following HTML table explicitly into the document where compensation is mentioned.
-
-DISPLAY RULE:
-- Insert the table below.
-- Do NOT list the salary components or amounts again in paragraph text.
-- Instead, write: "The detailed salary structure is annexed below:" and then show the table.
-
-{table_html}
+SALARY BREAKDOWN:
+A salary breakdown table is appended after the letter body automatically.
+- Do NOT list the salary components or amounts in paragraph text.
+- Instead, end the body with: "The detailed salary structure is annexed below:"
 """
             except Exception as e:
-                print(f"Error parsing salary json: {e}")
+                logger.warning("Error parsing salary json: %s", e)
 
         if pdf_text_content:
-            prompt += f"""
-
---------------------------------------------------
-REFERENCE TEMPLATE (FROM UPLOADED PDF):
-{pdf_text_content[:4000]}
---------------------------------------------------
-
-CRITICAL INSTRUCTIONS FOR TEMPLATE USAGE:
-1. Analyze the structure of the extracted PDF text.
-2. Replace all sample names, dates, salary values, and company names with the actual employee/company details.
-3. Restore formatting using HTML.
-4. Use the mandatory header and footer provided above.
-5. Ignore junk text like page numbers or extraction artifacts.
-
-EXPLICIT REPLACEMENTS:
-- "Dear Rahul" -> "Dear {employee.first_name} {employee.last_name}"
-- Old salary -> use salary from custom instructions
-- Old date -> "{current_date}"
-- Old company name -> target company name or overridden company name
-"""
+            prompt += _LETTER_PDF_REFERENCE.format(
+                pdf_excerpt=pdf_text_content[:_PDF_EXCERPT_CHARS],
+                first_name=employee.first_name,
+                last_name=employee.last_name,
+                current_date=current_date,
+            )
 
         if base64_image:
             prompt += (
@@ -789,21 +1175,111 @@ EXPLICIT REPLACEMENTS:
         else:
             messages.append({"role": "user", "content": prompt})
 
+        letter_head = _LETTER_SHELL_OPEN + header_html
+        letter_tail = table_html + footer_html + _LETTER_SHELL_CLOSE
+        return messages, letter_head, letter_tail
+
+    async def generate_official_letter(
+        self,
+        doc_type: str,
+        employee: Employee,
+        custom_instructions: str = "",
+        base64_image: Optional[str] = None,
+        pdf_text_content: Optional[str] = None,
+        salary_breakdown_json: Optional[str] = None,
+        company_name: str = "My Company",
+        company_logo: Optional[str] = None,
+        hr_signature: Optional[str] = None,
+    ) -> str:
+        """Generate official HR letters using LLM"""
+        messages, letter_head, letter_tail = self._prepare_letter(
+            doc_type, employee, custom_instructions, base64_image, pdf_text_content,
+            salary_breakdown_json, company_name, company_logo, hr_signature,
+        )
+
         try:
             response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 temperature=0.7,
-                max_tokens=2500,
+                max_tokens=_LETTER_MAX_TOKENS,
             )
-            content = response.choices[0].message.content
-            content = content.replace("```html", "").replace("```", "").strip()
-            return content
+            body = _strip_code_fence(response.choices[0].message.content or "")
+            return letter_head + body + letter_tail
 
         except Exception as e:
-            print(f"Error generating document: {e}")
+            logger.exception("Error generating document: %s", e)
             return f"<p style='color:red;'>Error generating document: {str(e)}</p>"
 
+    async def stream_official_letter(
+        self,
+        doc_type: str,
+        employee: Employee,
+        custom_instructions: str = "",
+        base64_image: Optional[str] = None,
+        pdf_text_content: Optional[str] = None,
+        salary_breakdown_json: Optional[str] = None,
+        company_name: str = "My Company",
+        company_logo: Optional[str] = None,
+        hr_signature: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Stream official HR letter HTML as the LLM writes it"""
+        messages, letter_head, letter_tail = self._prepare_letter(
+            doc_type, employee, custom_instructions, base64_image, pdf_text_content,
+            salary_breakdown_json, company_name, company_logo, hr_signature,
+        )
+
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=_LETTER_MAX_TOKENS,
+                stream=True,
+            )
+
+            yield letter_head
+
+            pending = ""
+            started = sent = False
+            try:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    pending += delta
+
+                    if not started:
+                        head = pending.lstrip()
+                        # Wait until we can tell whether the answer opens with a markdown fence
+                        if len(head) < len("```html") and "```html".startswith(head):
+                            continue
+                        pending = head.removeprefix("```html").removeprefix("```")
+                        started = True
+                    if not sent:
+                        pending = pending.lstrip()
+
+                    # Hold back trailing whitespace/backticks: they may be the closing fence
+                    cut = len(pending.rstrip("` \t\r\n"))
+                    if cut:
+                        yield pending[:cut]
+                        pending = pending[cut:]
+                        sent = True
+            finally:
+                await stream.close()
+
+            tail = _strip_code_fence(pending) if not started else pending.strip().removesuffix("```").strip()
+            if tail:
+                yield tail
+
+            yield letter_tail
+
+        except Exception as e:
+            logger.exception("Error generating document: %s", e)
+            yield f"<p style='color:red;'>Error generating document: {str(e)}</p>"
+
 
 # Global chatbot instance
 chatbot_service = ChatbotService()
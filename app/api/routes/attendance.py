@@ -2,9 +2,11 @@
 Attendance Routes
 Handles attendance check-in, check-out, and queries
 """
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, status
+from fastapi.responses import ORJSONResponse
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
+from functools import lru_cache
 from pydantic import BaseModel
 
 from app.models.attendance import (
@@ -25,6 +27,39 @@ from app.config import settings
 
 router = APIRouter()
 
+# Shift thresholds come from settings, so build them once
+LATE_ARRIVAL_GRACE = timedelta(minutes=settings.LATE_ARRIVAL_THRESHOLD_MINUTES)
+EARLY_DEPARTURE_GRACE = timedelta(minutes=settings.EARLY_DEPARTURE_THRESHOLD_MINUTES)
+SHORT_HOURS_ALERT_WINDOW = timedelta(minutes=60)
+
+# Mongo-side projection matching AttendanceResponse, with _id rendered as a string
+ATTENDANCE_LIST_PROJECTION = {
+    "_id": 0,
+    "id": {"$toString": "$_id"},
+    "employee_id": 1,
+    "employee_name": 1,
+    "date": 1,
+    "check_in_time": 1,
+    "check_out_time": 1,
+    "total_hours": 1,
+    "status": 1,
+    "is_late": 1,
+}
+
+
+async def send_alert(send, *args):
+    """Run an email alert in the background, never letting a failure escape"""
+    try:
+        await send(*args)
+    except Exception as e:
+        print(f"Failed to trigger {send.__name__} email: {e}")
+
+
+@lru_cache(maxsize=256)
+def parse_shift_time(value: str) -> time:
+    """Parse an "HH:MM" shift time; shifts repeat across employees, so cache them"""
+    return datetime.strptime(value, "%H:%M").time()
+
 
 class AttendanceQuery(BaseModel):
     """Query parameters for attendance"""
@@ -37,6 +72,7 @@ class AttendanceQuery(BaseModel):
 @router.post("/check-in")
 async def check_in(
     request: AttendanceCheckIn,
+    background_tasks: BackgroundTasks,
     current_employee: Employee = Depends(get_current_employee)
 ):
     """
@@ -52,13 +88,22 @@ async def check_in(
     # Define today's date for the record
     today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
 
-    # Check if there is an active session (checked in but not checked out)
-    active_session = await Attendance.find_one(
-        Attendance.employee_id == request.employee_id,
-        Attendance.check_out_time == None
-    )
+    # One round trip answers both "is a session still open?" and "checked in today already?"
+    session_flags = await Attendance.aggregate([
+        {"$match": {
+            "employee_id": request.employee_id,
+            "$or": [{"check_out_time": None}, {"date": {"$gte": today}}],
+        }},
+        {"$group": {
+            "_id": None,
+            "has_active": {"$max": {"$eq": [{"$ifNull": ["$check_out_time", None]}, None]}},
+            "has_today": {"$max": {"$gte": ["$date", today]}},
+        }},
+    ]).to_list()
+    flags = session_flags[0] if session_flags else {}
     
-    if active_session:
+    # Check if there is an active session (checked in but not checked out)
+    if flags.get("has_active"):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You are already checked in. Please check out before checking in again."
@@ -67,18 +112,11 @@ async def check_in(
     # Calculate if late (Only for the FIRST check-in of the day)
     check_in_time = datetime.utcnow()
     
-    # See if this is the first check-in today
-    first_today = await Attendance.find_one(
-        Attendance.employee_id == request.employee_id,
-        Attendance.date >= today
-    )
-    
     is_late = False
-    if not first_today:
-        shift_start = datetime.strptime(current_employee.shift_start_time, "%H:%M").time()
+    if not flags.get("has_today"):
+        shift_start = parse_shift_time(current_employee.shift_start_time)
         is_late = check_in_time.time() > (
-            datetime.combine(datetime.today(), shift_start) + 
-            timedelta(minutes=settings.LATE_ARRIVAL_THRESHOLD_MINUTES)
+            datetime.combine(datetime.today(), shift_start) + LATE_ARRIVAL_GRACE
         ).time()
     
     # Create new attendance record (since we support multiple sessions/toggle)
@@ -98,12 +136,9 @@ async def check_in(
     )
     await attendance.insert()
     
-    # Trigger late arrival email if applicable
+    # Trigger late arrival email if applicable (sent after the response goes out)
     if is_late:
-        try:
-            await email_service.send_late_arrival_alert(current_employee, check_in_time)
-        except Exception as e:
-            print(f"Failed to trigger late arrival email: {e}")
+        background_tasks.add_task(send_alert, email_service.send_late_arrival_alert, current_employee, check_in_time)
     
     return {
         "message": "Checked in successfully",
@@ -117,6 +152,7 @@ async def check_in(
 @router.post("/check-out")
 async def check_out(
     request: AttendanceCheckOut,
+    background_tasks: BackgroundTasks,
     current_employee: Employee = Depends(get_current_employee)
 ):
     """
@@ -154,10 +190,9 @@ async def check_out(
     attendance.total_hours = round(total_hours, 2)
     
     # Check for early departure
-    shift_end = datetime.strptime(current_employee.shift_end_time, "%H:%M").time()
+    shift_end = parse_shift_time(current_employee.shift_end_time)
     is_early = check_out_time.time() < (
-        datetime.combine(datetime.today(), shift_end) - 
-        timedelta(minutes=settings.EARLY_DEPARTURE_THRESHOLD_MINUTES)
+        datetime.combine(datetime.today(), shift_end) - EARLY_DEPARTURE_GRACE
     ).time()
     attendance.is_early_departure = is_early
     
@@ -167,13 +202,16 @@ async def check_out(
     
     await attendance.save()
     
-    # Calculate Total Daily Hours so far
-    daily_records = await Attendance.find(
-        Attendance.employee_id == request.employee_id,
-        Attendance.date >= attendance.date # Today's date
-    ).to_list()
+    # Calculate Total Daily Hours so far (summed in Mongo; only the total comes back)
+    daily_totals = await Attendance.aggregate([
+        {"$match": {
+            "employee_id": request.employee_id,
+            "date": {"$gte": attendance.date},  # Today's date
+        }},
+        {"$group": {"_id": None, "total_hours": {"$sum": "$total_hours"}}},
+    ]).to_list()
     
-    total_daily_hours = sum(r.total_hours or 0 for r in daily_records)
+    total_daily_hours = daily_totals[0]["total_hours"] if daily_totals else 0
     
     # Check 8-hour rule
     under_hours = total_daily_hours < 8.0
@@ -183,15 +221,14 @@ async def check_out(
     if under_hours:
         # If checkout is within 60 mins of shift end or later
         shift_end_dt = datetime.combine(datetime.today(), shift_end)
-        if check_out_time >= (shift_end_dt - timedelta(minutes=60)):
-            try:
-                await email_service.send_short_hours_alert(
-                    current_employee, 
-                    round(total_daily_hours, 2), 
-                    attendance.date
-                )
-            except Exception as e:
-                print(f"Failed to trigger short hours email: {e}")
+        if check_out_time >= (shift_end_dt - SHORT_HOURS_ALERT_WINDOW):
+            background_tasks.add_task(
+                send_alert,
+                email_service.send_short_hours_alert,
+                current_employee, 
+                round(total_daily_hours, 2), 
+                attendance.date
+            )
     
     return {
         "message": "Checked out successfully",
@@ -225,12 +262,18 @@ async def get_my_attendance(
         else:
             query["date"] = {"$lte": datetime.fromisoformat(end_date)}
     
-    records = await Attendance.find(query).sort("-date").to_list()
+    # Rows are stored validated; project and serialize them directly instead of
+    # re-validating every document through the response model
+    records = await Attendance.aggregate([
+        {"$match": query},
+        {"$sort": {"date": -1}},
+        {"$project": ATTENDANCE_LIST_PROJECTION},
+    ]).to_list()
     
-    return {
+    return ORJSONResponse({
         "total": len(records),
         "records": records
-    }
+    })
 
 
 @router.get("/today", response_model=TodayAttendanceResponse)
@@ -242,18 +285,19 @@ async def get_today_attendance(
     """
     today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
     
-    # First, look for an active session (checked in but not checked out)
-    attendance = await Attendance.find_one(
-        Attendance.employee_id == current_employee.employee_id,
-        Attendance.check_out_time == None
-    )
-    
-    # If no active session, look for the most recent completed session today
-    if not attendance:
-        attendance = await Attendance.find(
-            Attendance.employee_id == current_employee.employee_id,
-            Attendance.date >= today
-        ).sort("-check_in_time").first_or_none()
+    # One query: prefer an active session (checked in but not checked out),
+    # otherwise the most recent session today
+    matches = await Attendance.aggregate([
+        {"$match": {
+            "employee_id": current_employee.employee_id,
+            "$or": [{"check_out_time": None}, {"date": {"$gte": today}}],
+        }},
+        {"$addFields": {"_completed": {"$ne": [{"$ifNull": ["$check_out_time", None]}, None]}}},
+        {"$sort": {"_completed": 1, "check_in_time": -1}},
+        {"$limit": 1},
+        {"$project": ATTENDANCE_LIST_PROJECTION},
+    ], projection_model=AttendanceResponse).to_list()
+    attendance = matches[0] if matches else None
     
     if not attendance:
         return {
@@ -291,33 +335,40 @@ async def get_attendance_stats(
     else:
         end_date = datetime(year, month + 1, 1)
     
-    records = await Attendance.find(
-        Attendance.employee_id == current_employee.employee_id,
-        Attendance.date >= start_date,
-        Attendance.date < end_date
-    ).to_list()
-    
-    # Calculate statistics
-    total_days = len(records)
-    present_days = sum(1 for r in records if r.status == AttendanceStatus.PRESENT or r.status == AttendanceStatus.LATE)
-    late_days = sum(1 for r in records if r.is_late)
-    leave_days = sum(1 for r in records if r.status == AttendanceStatus.ON_LEAVE)
-    wfh_days = sum(1 for r in records if r.status == AttendanceStatus.WORK_FROM_HOME)
-    half_days = sum(1 for r in records if r.status == AttendanceStatus.HALF_DAY)
-    absent_days = sum(1 for r in records if r.status == AttendanceStatus.ABSENT)
-    
-    total_hours = sum(r.total_hours or 0 for r in records)
+    # Count the month in Mongo so only one summary document crosses the wire
+    summary = await Attendance.aggregate([
+        {"$match": {
+            "employee_id": current_employee.employee_id,
+            "date": {"$gte": start_date, "$lt": end_date},
+        }},
+        {"$group": {
+            "_id": None,
+            "total_days": {"$sum": 1},
+            "present_days": {"$sum": {"$cond": [{"$in": ["$status", [AttendanceStatus.PRESENT.value, AttendanceStatus.LATE.value]]}, 1, 0]}},
+            "late_days": {"$sum": {"$cond": ["$is_late", 1, 0]}},
+            "leave_days": {"$sum": {"$cond": [{"$eq": ["$status", AttendanceStatus.ON_LEAVE.value]}, 1, 0]}},
+            "wfh_days": {"$sum": {"$cond": [{"$eq": ["$status", AttendanceStatus.WORK_FROM_HOME.value]}, 1, 0]}},
+            "half_days": {"$sum": {"$cond": [{"$eq": ["$status", AttendanceStatus.HALF_DAY.value]}, 1, 0]}},
+            "absent_days": {"$sum": {"$cond": [{"$eq": ["$status", AttendanceStatus.ABSENT.value]}, 1, 0]}},
+            "total_hours": {"$sum": {"$ifNull": ["$total_hours", 0]}},
+        }},
+    ]).to_list()
+    totals = summary[0] if summary else {}
+    
+    total_days = totals.get("total_days", 0)
+    present_days = totals.get("present_days", 0)
+    total_hours = totals.get("total_hours", 0)
     
     return {
         "month": month,
         "year": year,
         "total_days": total_days,
         "present_days": present_days,
-        "late_days": late_days,
-        "leave_days": leave_days,
-        "wfh_days": wfh_days,
-        "half_days": half_days,
-        "absent_days": absent_days,
+        "late_days": totals.get("late_days", 0),
+        "leave_days": totals.get("leave_days", 0),
+        "wfh_days": totals.get("wfh_days", 0),
+        "half_days": totals.get("half_days", 0),
+        "absent_days": totals.get("absent_days", 0),
         "attendance_percentage": round((present_days / total_days * 100) if total_days > 0 else 0, 2),
         "total_hours": round(total_hours, 2),
         "average_hours": round(total_hours / total_days if total_days > 0 else 0, 2)
@@ -2,14 +2,19 @@
 Authentication Routes
 Handles login, registration, and token management
 """
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, EmailStr
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
+import jwt
+from jwt import PyJWTError as JWTError
 from passlib.context import CryptContext
 from typing import Optional
+import hashlib
+import time
 
+from app.ai.cache import TTLCache
 from app.config import settings
 from app.models.employee import Employee, EmployeeCreate
 
@@ -23,6 +28,13 @@ pwd_context = CryptContext(schemes=["pbkdf2_sha256", "bcrypt"], deprecated="auto
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# Signing key, encoded once rather than on every encode/decode
+_JWT_KEY = settings.SECRET_KEY.encode()
+_JWT_ALGORITHMS = [settings.ALGORITHM]
+
+# Verified token claims, so repeat requests with the same token skip JWT decoding
+_token_cache = TTLCache(max_entries=10_000, ttl_seconds=60)
+
 
 class Token(BaseModel):
     """Token response"""
@@ -58,6 +70,17 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+# PBKDF2/bcrypt are deliberately slow; run them off the event loop in request handlers
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify password against hash in a worker thread"""
+    return await run_in_threadpool(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash password in a worker thread"""
+    return await run_in_threadpool(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -68,36 +91,50 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _JWT_KEY, algorithm=settings.ALGORITHM)
     
     return encoded_jwt
 
 
-async def get_current_employee(token: str = Depends(oauth2_scheme)) -> Employee:
+async def get_current_employee(request: Request, token: str = Depends(oauth2_scheme)) -> Employee:
     """Get current authenticated employee"""
+    # Resolve at most once per request, even if re-entered outside FastAPI's dependency cache
+    employee = getattr(request.state, "current_employee", None)
+    if employee is not None:
+        return employee
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        employee_id: str = payload.get("sub")
+    token_key = hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+    cached = _token_cache.get(token_key)
+    if cached is not None and (cached[1] is None or cached[1] > time.time()):
+        token_data = TokenData(employee_id=cached[0])
+    else:
+        try:
+            payload = jwt.decode(token, _JWT_KEY, algorithms=_JWT_ALGORITHMS)
+            employee_id: str = payload.get("sub")
+            
+            if employee_id is None:
+                raise credentials_exception
+            
+            token_data = TokenData(employee_id=employee_id)
         
-        if employee_id is None:
+        except JWTError:
             raise credentials_exception
         
-        token_data = TokenData(employee_id=employee_id)
-    
-    except JWTError:
-        raise credentials_exception
+        _token_cache.set(token_key, (employee_id, payload.get("exp")))
     
+    # Always load the employee fresh: handlers read balances from it and save() it back
     employee = await Employee.find_one(Employee.employee_id == token_data.employee_id)
     
     if employee is None:
         raise credentials_exception
     
+    request.state.current_employee = employee
     return employee
 
 
@@ -115,7 +152,7 @@ async def register(request: RegisterRequest):
         )
     
     # Hash password
-    password_hash = get_password_hash(request.employee_data.password)
+    password_hash = await get_password_hash_async(request.employee_data.password)
     
     # Create employee
     employee_dict = request.employee_data.dict(exclude={"password"})
@@ -123,6 +160,10 @@ async def register(request: RegisterRequest):
     
     await employee.insert()
     
+    # Imported here: the employees routes import this module at load time
+    from app.api.routes.employees import invalidate_contacts_cache
+    invalidate_contacts_cache()
+    
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -145,7 +186,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     # Find employee by email (username field contains email)
     employee = await Employee.find_one(Employee.email == form_data.username)
     
-    if not employee or not verify_password(form_data.password, employee.password_hash):
+    if not employee or not await verify_password_async(form_data.password, employee.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -202,14 +243,14 @@ async def change_password(
     Change employee password
     """
     # Verify old password
-    if not verify_password(old_password, current_employee.password_hash):
+    if not await verify_password_async(old_password, current_employee.password_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect old password"
         )
     
     # Update password
-    current_employee.password_hash = get_password_hash(new_password)
+    current_employee.password_hash = await get_password_hash_async(new_password)
     await current_employee.save()
     
     return {"message": "Password changed successfully"}
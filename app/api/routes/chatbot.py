@@ -2,12 +2,16 @@
 Chatbot Routes
 AI-powered employee assistance
 """
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Header, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, List
+import hashlib
+import orjson
 
 from app.models.employee import Employee
 from app.api.routes.auth import get_current_employee
+from app.api.routes.dashboard import get_admin_stats
 from app.ai.chatbot import chatbot_service
 from app.config import settings
 from app.services.voicebot import voicebot_service
@@ -15,6 +19,23 @@ from app.services.voicebot import voicebot_service
 
 router = APIRouter()
 
+# Common query suggestions never change at runtime, so serialize them once
+_SUGGESTIONS_BODY = orjson.dumps({
+    "suggestions": [
+        "How do I apply for leave?",
+        "Show my attendance for this month",
+        "What is my leave balance?",
+        "How to mark attendance?",
+        "When is the next holiday?",
+        "What is the work from home policy?",
+        "How do I update my profile?",
+        "When is salary day?",
+        "What are the working hours?"
+    ]
+})
+_SUGGESTIONS_ETAG = '"' + hashlib.blake2b(_SUGGESTIONS_BODY, digest_size=8).hexdigest() + '"'
+_SUGGESTIONS_HEADERS = {"ETag": _SUGGESTIONS_ETAG, "Cache-Control": "public, max-age=3600"}
+
 
 class ChatRequest(BaseModel):
     """Chat request"""
@@ -40,6 +61,18 @@ class VoiceSessionsListResponse(BaseModel):
     sessions: List[VoiceSessionResponse]
 
 
+async def _build_chat_context(request: ChatRequest, current_employee: Employee) -> Dict:
+    """Request context, with collective stats injected for admin reports"""
+    context = request.context or {}
+
+    # If Admin is asking for reports, inject collective stats
+    if context.get("type") == "admin_reports" and current_employee.role in ["admin", "hr"]:
+        admin_stats = await get_admin_stats(current_employee)
+        context["all_stats"] = admin_stats
+
+    return context
+
+
 @router.post("/ask", response_model=ChatResponse)
 async def ask_chatbot(
     request: ChatRequest,
@@ -49,13 +82,7 @@ async def ask_chatbot(
     Ask the AI chatbot a question
     """
     try:
-        context = request.context or {}
-        
-        # If Admin is asking for reports, inject collective stats
-        if context.get("type") == "admin_reports" and current_employee.role in ["admin", "hr"]:
-            from app.api.routes.dashboard import get_admin_stats
-            admin_stats = await get_admin_stats(current_employee)
-            context["all_stats"] = admin_stats
+        context = await _build_chat_context(request, current_employee)
             
         response = await chatbot_service.get_response(
             query=request.query,
@@ -72,24 +99,45 @@ async def ask_chatbot(
         )
 
 
+@router.post("/ask/stream")
+async def ask_chatbot_stream(
+    request: ChatRequest,
+    current_employee: Employee = Depends(get_current_employee)
+):
+    """
+    Ask the AI chatbot a question and stream the answer as plain text
+    """
+    try:
+        context = await _build_chat_context(request, current_employee)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Chatbot error: {str(e)}"
+        )
+
+    return StreamingResponse(
+        chatbot_service.stream_response(
+            query=request.query,
+            employee_id=current_employee.employee_id,
+            context=context
+        ),
+        media_type="text/plain; charset=utf-8"
+    )
+
+
 @router.get("/suggestions")
-async def get_suggestions():
+async def get_suggestions(if_none_match: Optional[str] = Header(None)):
     """
     Get common query suggestions
     """
-    return {
-        "suggestions": [
-            "How do I apply for leave?",
-            "Show my attendance for this month",
-            "What is my leave balance?",
-            "How to mark attendance?",
-            "When is the next holiday?",
-            "What is the work from home policy?",
-            "How do I update my profile?",
-            "When is salary day?",
-            "What are the working hours?"
-        ]
-    }
+    if if_none_match == _SUGGESTIONS_ETAG:
+        return Response(status_code=304, headers=_SUGGESTIONS_HEADERS)
+
+    return Response(
+        content=_SUGGESTIONS_BODY,
+        media_type="application/json",
+        headers=_SUGGESTIONS_HEADERS
+    )
 
 
 @router.get("/voice/config")
@@ -144,20 +192,14 @@ async def get_voice_session(
     if not session:
         raise HTTPException(status_code=404, detail="Voice session not found")
 
-    return {
+    # Messages are dumped in one pass and orjson writes the datetimes, so long sessions skip jsonable_encoder
+    return ORJSONResponse({
         "session_id": str(session.id),
         "title": session.title,
-        "created_at": session.created_at.isoformat(),
-        "updated_at": session.updated_at.isoformat(),
-        "messages": [
-            {
-                "role": m.role,
-                "text": m.text,
-                "created_at": m.created_at.isoformat(),
-            }
-            for m in session.messages
-        ],
-    }
+        "created_at": session.created_at,
+        "updated_at": session.updated_at,
+        "messages": session.model_dump(include={"messages"})["messages"],
+    })
 
 
 @router.post("/voice/turn")
@@ -169,15 +211,16 @@ async def voice_turn(
     current_employee: Employee = Depends(get_current_employee),
 ):
     try:
-        audio_bytes = await audio.read()
-        if not audio_bytes:
+        # The upload is already spooled to a temp file; hand that file on rather
+        # than reading it all into memory
+        if not audio.size:
             raise HTTPException(status_code=400, detail="Audio file is empty")
 
         result = await voicebot_service.process_turn(
             employee_id=current_employee.employee_id,
             session_id=session_id,
             audio_filename=audio.filename or "voice.webm",
-            audio_bytes=audio_bytes,
+            audio_file=audio.file,
             input_language=input_language,
             response_language=response_language,
         )
@@ -7,12 +7,19 @@ from app.models.company import CompanySettings
 from app.models.employee import Employee
 from app.api.routes.auth import get_current_employee
 from datetime import datetime
+import asyncio
 import shutil
-import os
 import uuid
 
 router = APIRouter()
 
+
+def _save_upload(source, file_location: str):
+    """Copy an uploaded file to disk in 64 KiB chunks"""
+    with open(file_location, "wb") as buffer:
+        shutil.copyfileobj(source, buffer, 1 << 16)
+
+
 @router.get("/", response_model=CompanySettings)
 async def get_company_settings():
     """Get company settings (Public/Authenticated)"""
@@ -52,16 +59,14 @@ async def update_company_settings(
     existing.website = website
     
     if logo:
-        # Create uploads dir if not likely present (handled in main but good for safety)
-        os.makedirs("uploads", exist_ok=True)
-        
+        # The uploads dir is created at startup in main.py
         # specific file name
         file_extension = logo.filename.split(".")[-1]
         file_name = f"company_logo_{uuid.uuid4()}.{file_extension}"
         file_location = f"uploads/{file_name}"
         
-        with open(file_location, "wb") as buffer:
-            shutil.copyfileobj(logo.file, buffer)
+        # Blocking file I/O runs in a worker thread so the event loop stays free
+        await asyncio.to_thread(_save_upload, logo.file, file_location)
             
         # Update URL (assuming served from /uploads)
         from app.config import settings
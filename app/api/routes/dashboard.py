@@ -3,9 +3,14 @@ Dashboard Routes
 Analytics and reporting endpoints
 """
 from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+import copy
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
+from app.ai.cache import TTLCache
 from app.models.employee import Employee
 from app.models.attendance import Attendance, AttendanceStatus
 from app.models.leave import Leave, LeaveStatus
@@ -16,6 +21,22 @@ from app.api.routes.auth import get_current_employee
 
 router = APIRouter()
 
+_EPOCH = datetime(1970, 1, 1)
+
+# Admin stats are company-wide, so one snapshot per day serves every HR/admin caller for a short while
+_admin_stats_cache = TTLCache(max_entries=1, ttl_seconds=30)
+
+
+@lru_cache(maxsize=1)
+def _midnight_utc(epoch_day: int) -> datetime:
+    """Naive UTC midnight of the given day since the epoch"""
+    return _EPOCH + timedelta(days=epoch_day)
+
+
+def _today_utc() -> datetime:
+    """Today's UTC midnight, built once per day and shared by every query in a handler"""
+    return _midnight_utc(int(time.time()) // 86400)
+
 
 @router.get("/overview")
 async def get_dashboard_overview(
@@ -24,43 +45,54 @@ async def get_dashboard_overview(
     """
     Get dashboard overview for current employee
     """
-    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    # Today's attendance
-    today_attendance = await Attendance.find_one(
-        Attendance.employee_id == current_employee.employee_id,
-        Attendance.date >= today
-    )
+    today = _today_utc()
     
-    # This month's stats
     month_start = today.replace(day=1)
-    month_attendance = await Attendance.find(
-        Attendance.employee_id == current_employee.employee_id,
-        Attendance.date >= month_start
-    ).to_list()
     
-    # Pending leaves
-    pending_leaves = await Leave.find(
-        Leave.employee_id == current_employee.employee_id,
-        Leave.status == LeaveStatus.PENDING
-    ).to_list()
+    # The queries are independent, so run them concurrently
+    today_attendance, month_totals, pending_leaves, upcoming_holidays, upcoming_meals = await asyncio.gather(
+        # Today's attendance
+        Attendance.find_one(
+            Attendance.employee_id == current_employee.employee_id,
+            Attendance.date >= today
+        ),
+        # This month's stats, counted in Mongo
+        Attendance.aggregate([
+            {"$match": {
+                "employee_id": current_employee.employee_id,
+                "date": {"$gte": month_start},
+            }},
+            {"$group": {
+                "_id": None,
+                "total_days": {"$sum": 1},
+                "present_days": {"$sum": {"$cond": [{"$eq": ["$status", AttendanceStatus.PRESENT.value]}, 1, 0]}},
+                "late_days": {"$sum": {"$cond": ["$is_late", 1, 0]}},
+                "total_hours": {"$sum": {"$ifNull": ["$total_hours", 0]}},
+            }},
+        ]).to_list(),
+        # Pending leaves
+        Leave.find(
+            Leave.employee_id == current_employee.employee_id,
+            Leave.status == LeaveStatus.PENDING
+        ).count(),
+        # Upcoming Holidays (Next 5)
+        Holiday.find(
+            Holiday.date >= today
+        ).sort("date").limit(5).to_list(),
+        # Upcoming Meals
+        Meal.find(
+            Meal.employee_id == current_employee.employee_id,
+            Meal.booking_date >= str(today.date()),
+            Meal.status == "booked"
+        ).count(),
+    )
     
     # Calculate stats
-    present_days = sum(1 for a in month_attendance if a.status == AttendanceStatus.PRESENT)
-    late_days = sum(1 for a in month_attendance if a.is_late)
-    total_hours = sum(a.total_hours or 0 for a in month_attendance)
-    
-    # Upcoming Holidays (Next 5)
-    upcoming_holidays = await Holiday.find(
-        Holiday.date >= today
-    ).sort("date").limit(5).to_list()
-
-    # Upcoming Meals
-    upcoming_meals = await Meal.find(
-        Meal.employee_id == current_employee.employee_id,
-        Meal.booking_date >= str(today.date()),
-        Meal.status == "booked"
-    ).count()
+    month_stats = month_totals[0] if month_totals else {}
+    total_days = month_stats.get("total_days", 0)
+    present_days = month_stats.get("present_days", 0)
+    late_days = month_stats.get("late_days", 0)
+    total_hours = month_stats.get("total_hours", 0)
     
     return {
         "today": {
@@ -69,19 +101,18 @@ async def get_dashboard_overview(
             "status": today_attendance.status if today_attendance else "not_marked"
         },
         "this_month": {
-            "total_days": len(month_attendance),
+            "total_days": total_days,
             "present_days": present_days,
             "late_days": late_days,
             "total_hours": round(total_hours, 2),
-            "attendance_percentage": round((present_days / len(month_attendance) * 100) if month_attendance else 0, 2)
+            "attendance_percentage": round((present_days / total_days * 100) if total_days else 0, 2)
         },
         "leave_balance": {
             "casual": current_employee.casual_leave_balance,
             "sick": current_employee.sick_leave_balance,
             "annual": current_employee.annual_leave_balance
         },
-        "pending_leaves": len(pending_leaves),
-        "pending_leaves": len(pending_leaves),
+        "pending_leaves": pending_leaves,
         "upcoming_holidays": upcoming_holidays,
         "booked_meals": upcoming_meals
     }
@@ -100,60 +131,100 @@ async def get_admin_stats(
             detail="Only HR and Admin can access this endpoint"
         )
     
-    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    # Total employees
-    total_employees = await Employee.find().count()
-    active_employees = await Employee.find(Employee.is_active == True).count()
-    
-    # Today's attendance
-    today_attendance = await Attendance.find(
-        Attendance.date >= today
-    ).to_list()
+    today = _today_utc()
+    cache_key = today.date().isoformat()
+    stats = _admin_stats_cache.get(cache_key)
+    if stats is None:
+        stats = await _compute_admin_stats(today)
+        _admin_stats_cache.set(cache_key, stats)
+    # Callers (e.g. the chatbot context) get their own copy, never the cached entry
+    return copy.deepcopy(stats)
+
+
+async def _compute_admin_stats(today: datetime) -> dict:
+    """Run the admin dashboard queries and assemble the stats payload"""
+    trend_start = today - timedelta(days=6)
     
-    present_today = sum(1 for a in today_attendance if a.check_in_time)
-    late_today = sum(1 for a in today_attendance if a.is_late)
+    # Independent queries run concurrently
+    (
+        total_employees,
+        active_employees,
+        today_by_department,
+        pending_leaves,
+        employees_by_department,
+        daily_counts,
+        leave_counts,
+    ) = await asyncio.gather(
+        # Total employees
+        Employee.find().count(),
+        Employee.find(Employee.is_active == True).count(),
+        # Today's attendance, per department
+        Attendance.aggregate([
+            {"$match": {"date": {"$gte": today}}},
+            {"$group": {
+                "_id": "$department",
+                "records": {"$sum": 1},
+                "present": {"$sum": {"$cond": [{"$ifNull": ["$check_in_time", False]}, 1, 0]}},
+                "late": {"$sum": {"$cond": ["$is_late", 1, 0]}},
+            }},
+        ]).to_list(),
+        # Pending leaves
+        Leave.find(
+            Leave.status == LeaveStatus.PENDING
+        ).count(),
+        # Headcount per department
+        Employee.aggregate([
+            {"$group": {"_id": "$department", "total": {"$sum": 1}}},
+        ]).to_list(),
+        # Present/late per day for the 7-day trend, counted in one pass
+        Attendance.aggregate([
+            {"$match": {"date": {"$gte": trend_start}}},
+            {"$group": {
+                "_id": "$date",
+                "present": {"$sum": {"$cond": [{"$ifNull": ["$check_in_time", False]}, 1, 0]}},
+                "late": {"$sum": {"$cond": ["$is_late", 1, 0]}},
+            }},
+        ]).to_list(),
+        # Leaves per status
+        Leave.aggregate([
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+        ]).to_list(),
+    )
     
-    # Pending leaves
-    pending_leaves = await Leave.find(
-        Leave.status == LeaveStatus.PENDING
-    ).count()
+    records_today = sum(row["records"] for row in today_by_department)
+    present_today = sum(row["present"] for row in today_by_department)
+    late_today = sum(row["late"] for row in today_by_department)
     
     # Department-wise breakdown
     departments = {}
-    all_employees = await Employee.find().to_list()
     
-    for emp in all_employees:
-        dept = emp.department
-        if dept not in departments:
-            departments[dept] = {"total": 0, "present": 0}
-        departments[dept]["total"] += 1
+    for row in employees_by_department:
+        departments[row["_id"]] = {"total": row["total"], "present": 0}
     
-    for att in today_attendance:
-        dept = att.department
-        if dept in departments and att.check_in_time:
-            departments[dept]["present"] += 1
+    for row in today_by_department:
+        dept = row["_id"]
+        if dept in departments:
+            departments[dept]["present"] += row["present"]
     
     # Attendance Trends (Last 7 Days)
+    counts_by_date = {row["_id"]: row for row in daily_counts}
     attendance_trends = []
     for i in range(6, -1, -1):
         date = today - timedelta(days=i)
-        day_att = await Attendance.find(
-            Attendance.date == date
-        ).to_list()
+        day_counts = counts_by_date.get(date, {})
         
         attendance_trends.append({
             "date": date.strftime("%d %b"),
-            "present": sum(1 for a in day_att if a.check_in_time),
-            "late": sum(1 for a in day_att if a.is_late)
+            "present": day_counts.get("present", 0),
+            "late": day_counts.get("late", 0)
         })
 
     # Leave Stats
-    all_leaves = await Leave.find().to_list()
+    leaves_by_status = {row["_id"]: row["count"] for row in leave_counts}
     leave_stats = {
-        "pending": sum(1 for l in all_leaves if l.status == LeaveStatus.PENDING),
-        "approved": sum(1 for l in all_leaves if l.status == LeaveStatus.APPROVED),
-        "rejected": sum(1 for l in all_leaves if l.status == LeaveStatus.REJECTED)
+        "pending": leaves_by_status.get(LeaveStatus.PENDING.value, 0),
+        "approved": leaves_by_status.get(LeaveStatus.APPROVED.value, 0),
+        "rejected": leaves_by_status.get(LeaveStatus.REJECTED.value, 0)
     }
 
     return {
@@ -163,7 +234,7 @@ async def get_admin_stats(
             "inactive": total_employees - active_employees
         },
         "today_attendance": {
-            "total": len(today_attendance),
+            "total": records_today,
             "present": present_today,
             "absent": active_employees - present_today,
             "late": late_today,
@@ -3,14 +3,35 @@ Employee Routes
 Employee management endpoints
 """
 from fastapi import APIRouter, HTTPException, Depends, status
+from datetime import datetime
 from typing import List, Optional
+from pymongo.errors import DuplicateKeyError
 
-from app.models.employee import Employee, EmployeeUpdate, EmployeeResponse, EmployeeCreate
-from app.api.routes.auth import get_current_employee, get_password_hash
+from app.ai.cache import TTLCache
+from app.models.employee import Employee, EmployeeUpdate, EmployeeResponse, EmployeeCreate, EmployeeContact, EmployeeListItem, BankDetails
+from app.api.routes.auth import get_current_employee, get_password_hash_async
 
 
 router = APIRouter()
 
+# Notification recipients per role set; see invalidate_contacts_cache
+_contacts_cache = TTLCache(max_entries=8, ttl_seconds=300)
+
+
+async def get_contacts_by_role(*roles: str) -> List[EmployeeContact]:
+    """employee_id and email of every employee holding one of the given roles"""
+    key = ",".join(sorted(roles))
+    contacts = _contacts_cache.get(key)
+    if contacts is None:
+        contacts = await Employee.find({"role": {"$in": list(roles)}}).project(EmployeeContact).to_list()
+        _contacts_cache.set(key, contacts)
+    return contacts
+
+
+def invalidate_contacts_cache():
+    """Forget cached recipients; call after any write that adds an employee or changes a role"""
+    _contacts_cache.clear()
+
 
 @router.post("/", response_model=EmployeeResponse)
 async def create_employee(
@@ -26,19 +47,11 @@ async def create_employee(
             detail="Only Admins and HR can create employees"
         )
     
-    # Check if employee already exists
-    existing = await Employee.find_one(Employee.email == employee_data.email)
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-        
     # Hash password
-    password_hash = get_password_hash(employee_data.password)
+    password_hash = await get_password_hash_async(employee_data.password)
     
     # Create employee
-    employee_dict = employee_data.dict(exclude={"password"})
+    employee_dict = employee_data.model_dump(exclude={"password"})
     
     # Remove None values for nested models to allow defaults to trigger
     if employee_dict.get("bank_details") is None:
@@ -48,8 +61,17 @@ async def create_employee(
         
     employee = Employee(**employee_dict, password_hash=password_hash)
     
-    await employee.insert()
+    # The unique indexes on email and employee_id reject duplicates atomically
+    try:
+        await employee.insert()
+    except DuplicateKeyError as e:
+        key_pattern = (e.details or {}).get("keyPattern", {})
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Employee ID already exists" if "employee_id" in key_pattern else "Email already registered"
+        )
     
+    invalidate_contacts_cache()
     return employee
 
 
@@ -65,7 +87,8 @@ async def update_my_profile(
     current_employee: Employee = Depends(get_current_employee)
 ):
     """Update current employee profile"""
-    update_dict = update_data.dict(exclude_unset=True)
+    update_dict = update_data.model_dump(exclude_unset=True)
+    patch = {}
     
     # Check if attempting to update bank details
     # Check if attempting to update bank details
@@ -87,23 +110,25 @@ async def update_my_profile(
             )
         
         # Handle nested update for bank details
-        bd_data = update_dict.pop("bank_details")
+        bd_data = {field: value for field, value in update_dict.pop("bank_details").items() if value is not None}
         if not current_employee.bank_details:
-             from app.models.employee import BankDetails
-             current_employee.bank_details = BankDetails()
-             
-        for field, value in bd_data.items():
-             if value is not None:
-                 setattr(current_employee.bank_details, field, value)
+             # Dotted paths cannot be set under a null parent, so write the whole sub-document
+             patch["bank_details"] = BankDetails(**bd_data).model_dump()
+        else:
+             for field, value in bd_data.items():
+                 patch[f"bank_details.{field}"] = value
 
     for field, value in update_dict.items():
         if field == "salary_details": 
              continue # Employees cannot update their own salary
         if field == "is_bank_details_locked":
              continue # Employees cannot unlock themselves
-        setattr(current_employee, field, value)
+        patch[field] = value
     
-    await current_employee.save()
+    if patch:
+        await current_employee.set(patch)
+        if "role" in patch:
+            invalidate_contacts_cache()
     
     return {
         "message": "Profile updated successfully",
@@ -132,8 +157,7 @@ async def unlock_bank_details(
             detail="Employee not found"
         )
         
-    employee.is_bank_details_locked = False
-    await employee.save()
+    await employee.set({"is_bank_details_locked": False})
     
     return {"message": f"Bank details unlocked for employee {employee_id}"}
 
@@ -159,8 +183,7 @@ async def lock_bank_details(
             detail="Employee not found"
         )
         
-    employee.is_bank_details_locked = True
-    await employee.save()
+    await employee.set({"is_bank_details_locked": True})
     
     return {"message": f"Bank details locked for employee {employee_id}"}
 
@@ -184,7 +207,7 @@ async def get_all_employees(
     if department:
         query["department"] = department
     
-    employees = await Employee.find(query).to_list()
+    employees = await Employee.find(query).project(EmployeeListItem).to_list()
     
     return {
         "total": len(employees),
@@ -253,28 +276,33 @@ async def update_employee(
             detail="Employee not found"
         )
     
-    update_dict = update_data.dict(exclude_unset=True)
+    update_dict = update_data.model_dump(exclude_unset=True)
+    
+    # Collect every change into a single $set
+    patch = {}
     
     # Nested address update
     if "address" in update_dict and update_dict["address"]:
         addr_data = update_dict.pop("address")
         for field, value in addr_data.items():
             if value is not None:
-                setattr(employee.address, field, value)
+                patch[f"address.{field}"] = value
                 
     # Nested emergency contact update
     if "emergency_contact" in update_dict and update_dict["emergency_contact"]:
         ec_data = update_dict.pop("emergency_contact")
         for field, value in ec_data.items():
             if value is not None:
-                setattr(employee.emergency_contact, field, value)
+                patch[f"emergency_contact.{field}"] = value
 
     for field, value in update_dict.items():
         if value is not None:
-            setattr(employee, field, value)
+            patch[field] = value
     
-    employee.updated_at = datetime.utcnow()
-    await employee.save()
+    patch["updated_at"] = datetime.utcnow()
+    await employee.set(patch)
+    if "role" in patch:
+        invalidate_contacts_cache()
     
     return {
         "message": "Employee updated successfully",
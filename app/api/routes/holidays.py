@@ -2,20 +2,73 @@
 Holiday Routes
 Admin management and public listing
 """
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from datetime import datetime
+from fastapi import APIRouter, HTTPException, Depends, Response
+from typing import Dict, List
+from datetime import date, datetime
+import orjson
 
+from app.ai.cache import TTLCache
 from app.models.holiday import Holiday, HolidayResponse, HolidayType
 from app.models.employee import Employee
 from app.api.routes.auth import get_current_employee
 
 router = APIRouter()
 
+# Holidays change only through the admin endpoints below, which invalidate this cache
+_holiday_cache = TTLCache(max_entries=3, ttl_seconds=60)
+# Bumped on every invalidation, so a read that raced a write never caches what it loaded
+_holiday_generation = 0
+
+
+def _invalidate_holidays():
+    """Drop cached holidays after an admin write"""
+    global _holiday_generation
+    _holiday_generation += 1
+    _holiday_cache.clear()
+
+
+def _cache_holidays(key: str, value, generation: int):
+    """Cache a value loaded since `generation`, unless a write happened meanwhile"""
+    if generation == _holiday_generation:
+        _holiday_cache.set(key, value)
+
+
+async def get_cached_holidays() -> List[Holiday]:
+    """All holidays sorted by date, served from a short-lived in-process cache"""
+    holidays = _holiday_cache.get("all")
+    if holidays is None:
+        generation = _holiday_generation
+        holidays = await Holiday.find().sort("date").to_list()
+        _cache_holidays("all", holidays, generation)
+    return holidays
+
+
+async def get_holiday_names_by_date() -> Dict[date, str]:
+    """Holiday name per calendar day, for O(1) "is this a holiday?" checks"""
+    names = _holiday_cache.get("by_date")
+    if names is None:
+        generation = _holiday_generation
+        names = {holiday.date.date(): holiday.name for holiday in await get_cached_holidays()}
+        _cache_holidays("by_date", names, generation)
+    return names
+
+
+async def get_cached_holidays_json() -> bytes:
+    """The holiday listing serialized once per cache fill"""
+    body = _holiday_cache.get("json")
+    if body is None:
+        generation = _holiday_generation
+        holidays = await get_cached_holidays()
+        body = orjson.dumps([holiday.model_dump(mode="json", by_alias=True) for holiday in holidays])
+        _cache_holidays("json", body, generation)
+    return body
+
+
 @router.get("/", response_model=List[HolidayResponse])
 async def get_all_holidays():
     """Get all holidays sorted by date"""
-    return await Holiday.find().sort("date").to_list()
+    # Returning a Response skips per-request response_model validation; the model still documents the shape
+    return Response(content=await get_cached_holidays_json(), media_type="application/json")
 
 @router.post("/", response_model=HolidayResponse)
 async def create_holiday(
@@ -27,6 +80,7 @@ async def create_holiday(
         raise HTTPException(status_code=403, detail="Not authorized")
     
     await holiday.insert()
+    _invalidate_holidays()
     return holiday
 
 @router.put("/{holiday_id}", response_model=HolidayResponse)
@@ -44,6 +98,7 @@ async def update_holiday(
         raise HTTPException(status_code=404, detail="Holiday not found")
     
     await existing.update({"$set": holiday_update.model_dump(exclude={"id"})})
+    _invalidate_holidays()
     return existing
 
 @router.delete("/{holiday_id}")
@@ -60,4 +115,5 @@ async def delete_holiday(
         raise HTTPException(status_code=404, detail="Holiday not found")
     
     await holiday.delete()
+    _invalidate_holidays()
     return {"message": "Holiday deleted successfully"}
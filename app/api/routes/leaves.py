@@ -2,9 +2,11 @@
 Leave Routes
 Leave application and management
 """
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, status
 from typing import List, Optional
 from datetime import datetime
+import asyncio
+import logging
 
 from app.models.leave import (
     Leave,
@@ -19,14 +21,23 @@ from app.models.leave import (
     PydanticObjectId
 )
 from app.models.employee import Employee
-from app.models.holiday import Holiday
 from app.models.notification import Notification, NotificationType
 from app.api.routes.auth import get_current_employee
+from app.api.routes.employees import get_contacts_by_role
+from app.api.routes.holidays import get_holiday_names_by_date
 from app.services.email import email_service
 from app.config import settings
 
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Leave types that draw down a balance, and the Employee field holding it
+LEAVE_BALANCE_FIELDS = {
+    LeaveType.CASUAL: "casual_leave_balance",
+    LeaveType.SICK: "sick_leave_balance",
+    LeaveType.ANNUAL: "annual_leave_balance",
+}
 
 
 @router.post("/apply")
@@ -45,14 +56,15 @@ async def apply_leave(
         )
     
     # Check for holidays
-    holiday_start = await Holiday.find_one(Holiday.date == request.start_date)
-    holiday_end = await Holiday.find_one(Holiday.date == request.end_date)
+    holidays = await get_holiday_names_by_date()
+    holiday_start = holidays.get(request.start_date.date())
+    holiday_end = holidays.get(request.end_date.date())
     
     holiday_warning = None
     if holiday_start:
-        holiday_warning = f"Note: {request.start_date.strftime('%d %b')} is a holiday ({holiday_start.name})"
+        holiday_warning = f"Note: {request.start_date.strftime('%d %b')} is a holiday ({holiday_start})"
     elif holiday_end:
-        holiday_warning = f"Note: {request.end_date.strftime('%d %b')} is a holiday ({holiday_end.name})"
+        holiday_warning = f"Note: {request.end_date.strftime('%d %b')} is a holiday ({holiday_end})"
     
     # Calculate total days
     total_days = (request.end_date - request.start_date).days + 1
@@ -92,19 +104,28 @@ async def apply_leave(
     
     await leave.insert()
     
-    # Notify Managers/HR
-    managers = await Employee.find({"role": {"$in": ["hr", "admin"]}}).to_list()
-    for m in managers:
-        notif = Notification(
-            recipient_id=m.employee_id,
-            recipient_email=m.email,
-            title="New Leave Application",
-            message=f"{current_employee.first_name} applied for {leave.leave_type} leave.",
-            type=NotificationType.LEAVE_APPLIED,
-            link="/admin"
+    # Notify Managers/HR: one bulk insert, emails sent concurrently
+    managers = await get_contacts_by_role("hr", "admin")
+    if managers:
+        await Notification.insert_many([
+            Notification(
+                recipient_id=m.employee_id,
+                recipient_email=m.email,
+                title="New Leave Application",
+                message=f"{current_employee.first_name} applied for {leave.leave_type} leave.",
+                type=NotificationType.LEAVE_APPLIED,
+                link="/admin"
+            )
+            for m in managers
+        ])
+        employee_name = f"{current_employee.first_name} {current_employee.last_name}"
+        results = await asyncio.gather(
+            *(email_service.send_leave_application_notification(m.email, employee_name, leave) for m in managers),
+            return_exceptions=True
         )
-        await notif.insert()
-        await email_service.send_leave_application_notification(m.email, f"{current_employee.first_name} {current_employee.last_name}", leave)
+        for m, result in zip(managers, results):
+            if isinstance(result, Exception):
+                logger.warning("Leave application email to %s failed: %s", m.email, result)
     
     return {
         "message": "Leave application submitted successfully",
@@ -119,6 +140,8 @@ async def apply_leave(
 async def get_all_leaves(
     status: Optional[LeaveStatus] = None,
     department: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    size: int = Query(50, ge=1, le=200),
     current_employee: Employee = Depends(get_current_employee)
 ):
     """
@@ -147,10 +170,13 @@ async def get_all_leaves(
         if not department:
             query["department"] = {"$ne": current_employee.department}
         
-    leaves = await Leave.find(query).sort("-applied_at").to_list()
+    total, leaves = await asyncio.gather(
+        Leave.find(query).count(),
+        Leave.find(query).project(LeaveResponse).sort("-applied_at").skip((page - 1) * size).limit(size).to_list(),
+    )
     
     return {
-        "total": len(leaves),
+        "total": total,
         "leaves": leaves
     }
 
@@ -158,6 +184,8 @@ async def get_all_leaves(
 @router.get("/my-leaves", response_model=LeaveListResponse)
 async def get_my_leaves(
     status: Optional[LeaveStatus] = None,
+    page: int = Query(1, ge=1),
+    size: int = Query(50, ge=1, le=200),
     current_employee: Employee = Depends(get_current_employee)
 ):
     """
@@ -168,10 +196,13 @@ async def get_my_leaves(
     if status:
         query["status"] = status
     
-    leaves = await Leave.find(query).sort("-applied_at").to_list()
+    total, leaves = await asyncio.gather(
+        Leave.find(query).count(),
+        Leave.find(query).project(LeaveResponse).sort("-applied_at").skip((page - 1) * size).limit(size).to_list(),
+    )
     
     return {
-        "total": len(leaves),
+        "total": total,
         "leaves": leaves
     }
 
@@ -259,49 +290,40 @@ async def approve_leave(
     leave.status = request.status
     leave.updated_at = datetime.utcnow()
     
-    await leave.save()
-    
-    # If approved, deduct from leave balance
-    if request.status == LeaveStatus.APPROVED:
+    # If approved, deduct from leave balance; the filter makes check-and-decrement one atomic update
+    balance_field = LEAVE_BALANCE_FIELDS.get(leave.leave_type)
+    if request.status == LeaveStatus.APPROVED and balance_field:
         try:
-            employee = await Employee.find_one(Employee.employee_id == leave.employee_id)
-            
-            if not employee:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Employee with ID {leave.employee_id} not found"
-                )
-            
-            if leave.leave_type == LeaveType.CASUAL:
-                employee.casual_leave_balance -= leave.total_days
-            elif leave.leave_type == LeaveType.SICK:
-                employee.sick_leave_balance -= leave.total_days
-            elif leave.leave_type == LeaveType.ANNUAL:
-                employee.annual_leave_balance -= leave.total_days
-            
-            await employee.save()
+            result = await Employee.find_one(
+                Employee.employee_id == leave.employee_id,
+                {balance_field: {"$gte": leave.total_days}}
+            ).update({"$inc": {balance_field: -leave.total_days}})
         except Exception as e:
             print(f"Error deducting leave balance: {e}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error updating leave balance: {str(e)}"
             )
+        
+        if not result or not result.modified_count:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient {leave.leave_type} leave balance"
+            )
     
     await leave.save()
     
-    # Notify Employee
-    employee = await Employee.find_one(Employee.employee_id == leave.employee_id)
-    if employee:
-        notif = Notification(
-            recipient_id=employee.employee_id,
-            recipient_email=employee.email,
-            title=f"Leave Request {request.status.capitalize()}",
-            message=f"Your {leave.leave_type} leave request has been {request.status}.",
-            type=NotificationType.LEAVE_APPROVED if request.status == LeaveStatus.APPROVED else NotificationType.LEAVE_REJECTED,
-            link="/leaves"
-        )
-        await notif.insert()
-        await email_service.send_leave_status_notification(employee, leave, request.status)
+    # Notify Employee (the requester fetched above has everything the notification needs)
+    notif = Notification(
+        recipient_id=requester.employee_id,
+        recipient_email=requester.email,
+        title=f"Leave Request {request.status.capitalize()}",
+        message=f"Your {leave.leave_type} leave request has been {request.status}.",
+        type=NotificationType.LEAVE_APPROVED if request.status == LeaveStatus.APPROVED else NotificationType.LEAVE_REJECTED,
+        link="/leaves"
+    )
+    await notif.insert()
+    await email_service.send_leave_status_notification(requester, leave, request.status)
     
     return {
         "message": f"Leave {request.status}",
@@ -2,17 +2,18 @@
 Meal Routes
 Endpoints for booking and managing meals
 """
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
 
 from app.models.employee import Employee
 from app.models.meal import Meal, MealCreate, MealUpdate, DailyMenu, DailyMenuCreate
-from app.models.holiday import Holiday
 from app.models.leave import Leave, LeaveStatus
 from app.models.notification import Notification
 from app.api.routes.auth import get_current_employee
+from app.api.routes.employees import get_contacts_by_role
+from app.api.routes.holidays import get_holiday_names_by_date
 
 router = APIRouter()
 
@@ -27,20 +28,18 @@ async def get_meal_stats(
     
     target_date = date or str(datetime.utcnow().date())
     
-    meals = await Meal.find(
-        Meal.booking_date == target_date,
-        Meal.status == "booked"
-    ).to_list()
-    
-    veg_count = sum(1 for m in meals if m.category == "veg")
-    non_veg_count = sum(1 for m in meals if m.category == "non-veg")
+    # Tally bookings per category in Mongo; the full list is served by /meals/all
+    rows = await Meal.aggregate([
+        {"$match": {"booking_date": target_date, "status": "booked"}},
+        {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+    ]).to_list()
+    counts = {row["_id"]: row["count"] for row in rows}
     
     return {
         "date": target_date,
-        "total": len(meals),
-        "veg": veg_count,
-        "non_veg": non_veg_count,
-        "details": meals
+        "total": sum(counts.values()),
+        "veg": counts.get("veg", 0),
+        "non_veg": counts.get("non-veg", 0)
     }
 
 @router.post("/menu", response_model=DailyMenu)
@@ -134,14 +133,10 @@ async def book_meal(
         raise HTTPException(status_code=400, detail="Cannot book meals on weekends")
 
     # 2. Check for Holiday
-    # Checking range to cover the day regardless of time
-    next_day = booking_dt + timedelta(days=1)
-    holiday = await Holiday.find_one(
-        Holiday.date >= booking_dt,
-        Holiday.date < next_day
-    )
+    # Holidays are keyed by calendar day, so the time of day doesn't matter
+    holiday = (await get_holiday_names_by_date()).get(booking_dt.date())
     if holiday:
-        raise HTTPException(status_code=400, detail=f"Cannot book meal on holiday: {holiday.name}")
+        raise HTTPException(status_code=400, detail=f"Cannot book meal on holiday: {holiday}")
 
     # 3. Check for Leave
     leave = await Leave.find_one(
@@ -165,18 +160,20 @@ async def book_meal(
     )
     await meal.insert()
 
-    # Notify Admins
-    admins = await Employee.find(Employee.role == "admin").to_list()
-    for admin in admins:
-        notification = Notification(
-            recipient_id=admin.employee_id,
-            recipient_email=admin.email,
-            title="New Meal Booking",
-            message=f"{current_employee.first_name} booked {request.items} for {request.booking_date}",
-            type="general",
-            link="/admin"
-        )
-        await notification.insert()
+    # Notify Admins in one bulk insert
+    admins = await get_contacts_by_role("admin")
+    if admins:
+        await Notification.insert_many([
+            Notification(
+                recipient_id=admin.employee_id,
+                recipient_email=admin.email,
+                title="New Meal Booking",
+                message=f"{current_employee.first_name} booked {request.items} for {request.booking_date}",
+                type="general",
+                link="/admin"
+            )
+            for admin in admins
+        ])
 
     return meal
 
@@ -184,6 +181,8 @@ async def book_meal(
 async def get_my_meals(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    size: int = Query(50, ge=1, le=200),
     current_employee: Employee = Depends(get_current_employee)
 ):
     """Get current employee's meal bookings"""
@@ -195,7 +194,7 @@ async def get_my_meals(
     if start_date and end_date:
         query["booking_date"] = {"$gte": start_date, "$lte": end_date}
         
-    return await Meal.find(query).sort("-booking_date").to_list()
+    return await Meal.find(query).sort("-booking_date").skip((page - 1) * size).limit(size).to_list()
 
 @router.get("/all", response_model=List[Meal])
 async def get_all_meals(
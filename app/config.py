@@ -23,6 +23,10 @@ class Settings(BaseSettings):
     # MongoDB
     MONGODB_URL: str = "mongodb://localhost:27017"
     MONGODB_DB_NAME: str = "attendance_system"
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 10
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGODB_COMPRESSORS: str = "zstd,zlib"
     
     # JWT
     SECRET_KEY: str = "your-super-secret-key-change-this-in-production"
@@ -35,6 +39,7 @@ class Settings(BaseSettings):
     OPENAI_MODEL: str = "gpt-4-turbo-preview"
     OPENAI_TEMPERATURE: float = 0.7
     OPENAI_MAX_TOKENS: int = 500
+    OPENAI_MAX_INPUT_CHARS: int = 2000
 
     # Groq API
     GROQ_API_KEY: str = ""
@@ -43,6 +48,22 @@ class Settings(BaseSettings):
     GROQ_TTS_MODEL: str = "playai-tts"
     GROQ_TTS_VOICE: str = "hannah"
 
+    # LLM HTTP connection pool
+    LLM_MAX_CONNECTIONS: int = 1000
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 500
+    LLM_TIMEOUT_SECONDS: float = 60.0
+    LLM_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    LLM_HTTP2: bool = True
+
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    LLM_SEMANTIC_CACHE_SIZE: int = 1000
+    LLM_SEMANTIC_CACHE_SCOPE_SIZE: int = 50
+    LLM_SEMANTIC_CACHE_TTL_SECONDS: int = 1800
+    LLM_EXACT_CACHE_SIZE: int = 2048
+    LLM_EXACT_CACHE_TTL_SECONDS: int = 3600
+
     # TTS engine selection
     # Options: "groq" (recommended on Render), "xtts" (requires extra dependencies)
     TTS_ENGINE: str = "groq"
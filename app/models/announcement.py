@@ -6,6 +6,7 @@ from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, Field
 from beanie import Document
+from pymongo import ASCENDING, DESCENDING, IndexModel
 
 class Announcement(Document):
     """Announcement document model"""
@@ -20,7 +21,13 @@ class Announcement(Document):
     
     class Settings:
         name = "announcements"
-        indexes = ["priority", "category", "created_at"]
+        indexes = [
+            "priority",
+            "category",
+            "created_at",
+            # Active announcements, newest first
+            IndexModel([("is_active", ASCENDING), ("created_at", DESCENDING)]),
+        ]
 
 class AnnouncementCreate(BaseModel):
     """Schema for creating an announcement"""
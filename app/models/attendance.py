@@ -6,6 +6,7 @@ from datetime import datetime
 from typing import Optional, List
 from pydantic import BaseModel, Field
 from beanie import Document, PydanticObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from enum import Enum
 
 
@@ -89,7 +90,12 @@ class Attendance(Document):
         indexes = [
             "employee_id",
             "date",
-            ("employee_id", "date"),  # Compound index
+            # Compound index for per-employee date-range queries, newest first
+            IndexModel([("employee_id", ASCENDING), ("date", DESCENDING)]),
+            # Open-session lookups (check_out_time == None), latest check-in first
+            IndexModel([("employee_id", ASCENDING), ("check_out_time", ASCENDING), ("check_in_time", DESCENDING)]),
+            # Per-employee status/lateness counts
+            IndexModel([("employee_id", ASCENDING), ("status", ASCENDING), ("is_late", ASCENDING)]),
             "status",
         ]
     
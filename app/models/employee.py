@@ -6,6 +6,7 @@ from datetime import datetime
 from typing import Optional, List
 from pydantic import BaseModel, EmailStr, Field, field_validator
 from beanie import Document, PydanticObjectId
+from pymongo import ASCENDING, IndexModel
 
 
 class Address(BaseModel):
@@ -125,8 +126,9 @@ class Employee(Document):
     class Settings:
         name = "employees"
         indexes = [
-            "employee_id",
-            "email",
+            # Unique indexes let inserts reject duplicates without a read-then-insert check
+            IndexModel([("employee_id", ASCENDING)], unique=True),
+            IndexModel([("email", ASCENDING)], unique=True),
             "department",
             "role",
         ]
@@ -193,6 +195,36 @@ class EmployeeUpdate(BaseModel):
     documents: Optional[List[EmployeeDocument]] = None
 
 
+class EmployeeLeaveView(BaseModel):
+    """Projection of the fields needed for leave balance summaries"""
+    employee_id: str
+    first_name: str
+    casual_leave_balance: float = 12.0
+    sick_leave_balance: float = 10.0
+    annual_leave_balance: float = 20.0
+
+
+class EmployeeContact(BaseModel):
+    """Projection of the fields needed to notify an employee"""
+    employee_id: str
+    email: str
+
+
+class EmployeeListItem(BaseModel):
+    """Projection of the public fields shown in the employee directory"""
+    employee_id: str
+    first_name: str
+    last_name: str
+    email: str
+    department: str
+    designation: str
+    role: str = "employee"
+    is_active: bool = True
+    shift_start_time: str = "09:00"
+    shift_end_time: str = "18:00"
+    working_days: List[str] = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+
 class EmployeeResponse(BaseModel):
     """Schema for employee response (without sensitive data)"""
     id: PydanticObjectId
@@ -18,6 +18,7 @@ class Holiday(Document):
 
     class Settings:
         name = "holidays"
+        indexes = ["date"]
 
 class HolidayResponse(Holiday):
     pass
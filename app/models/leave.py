@@ -6,6 +6,7 @@ from datetime import datetime
 from typing import Optional, List
 from pydantic import BaseModel, Field
 from beanie import Document, PydanticObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from enum import Enum
 
 
@@ -79,6 +80,12 @@ class Leave(Document):
             "status",
             "leave_type",
             ("start_date", "end_date"),
+            # Per-employee pending/approved counts
+            IndexModel([("employee_id", ASCENDING), ("status", ASCENDING)]),
+            # My leaves, newest first
+            IndexModel([("employee_id", ASCENDING), ("applied_at", DESCENDING)]),
+            # Manager/HR listing filtered by status and department, newest first
+            IndexModel([("status", ASCENDING), ("department", ASCENDING), ("applied_at", DESCENDING)]),
         ]
     
     class Config:
@@ -140,6 +147,21 @@ class LeaveResponse(BaseModel):
     
     class Config:
         from_attributes = True
+    
+    class Settings:
+        # Used as a Beanie projection for leave listings
+        projection = {
+            "id": "$_id",
+            "employee_id": 1,
+            "employee_name": 1,
+            "leave_type": 1,
+            "start_date": 1,
+            "end_date": 1,
+            "total_days": 1,
+            "reason": 1,
+            "status": 1,
+            "applied_at": 1,
+        }
 
 
 class LeaveBalance(BaseModel):
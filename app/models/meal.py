@@ -6,6 +6,7 @@ from datetime import datetime
 from typing import Optional, List
 from pydantic import BaseModel, Field
 from beanie import Document, PydanticObjectId
+from pymongo import ASCENDING, IndexModel
 
 class Meal(Document):
     """
@@ -29,7 +30,13 @@ class Meal(Document):
             "employee_id",
             "booking_date",
             "status",
-            "meal_type"
+            "meal_type",
+            # Upcoming bookings per employee
+            IndexModel([("employee_id", ASCENDING), ("status", ASCENDING), ("booking_date", ASCENDING)]),
+            # Duplicate-booking check and my meals by date
+            IndexModel([("employee_id", ASCENDING), ("booking_date", ASCENDING), ("meal_type", ASCENDING)]),
+            # Booked meals for a day (stats, canteen list)
+            IndexModel([("booking_date", ASCENDING), ("status", ASCENDING)]),
         ]
 
 class MealCreate(BaseModel):
@@ -1,5 +1,7 @@
 from beanie import Document
 from datetime import datetime
+from pydantic import Field
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from typing import Optional
 from enum import Enum
 
@@ -17,8 +19,13 @@ class Notification(Document):
     message: str
     type: NotificationType
     is_read: bool = False
-    created_at: datetime = datetime.utcnow()
+    created_at: datetime = Field(default_factory=datetime.utcnow)
     link: Optional[str] = None
 
     class Settings:
         name = "notifications"
+        indexes = [
+            # Latest notifications per recipient, all or unread only
+            IndexModel([("recipient_id", ASCENDING), ("created_at", DESCENDING)]),
+            IndexModel([("recipient_id", ASCENDING), ("is_read", ASCENDING), ("created_at", DESCENDING)]),
+        ]
@@ -1,3 +1,4 @@
+import asyncio
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -44,16 +45,21 @@ class EmailService:
             
             msg.attach(MIMEText(html_content, 'html'))
             
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_user, self.smtp_password)
-                server.send_message(msg)
+            # smtplib is blocking; keep the SMTP round trips off the event loop
+            await asyncio.to_thread(self._deliver, msg)
             
             return True
         except Exception as e:
             print(f"Failed to send email to {to_email}: {e}")
             return False
 
+    def _deliver(self, msg):
+        """Send a prepared message over SMTP"""
+        with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
+            server.starttls()
+            server.login(self.smtp_user, self.smtp_password)
+            server.send_message(msg)
+
     async def send_late_arrival_alert(self, employee, check_in_time):
         """Send notification for late arrival"""
         template = self._get_template("late_arrival")
@@ -4,14 +4,20 @@ Uses Groq STT + LangChain(ChatGroq) + XTTS TTS and stores conversation history.
 """
 from __future__ import annotations
 
-import base64
 import os
 import tempfile
+import threading
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import BinaryIO, Dict, List, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor
 import asyncio
 
+try:
+    # SIMD base64; reply audio is encoded on every voicebot turn
+    import pybase64 as base64
+except ImportError:
+    import base64
+
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langchain_groq import ChatGroq
 from openai import AsyncOpenAI
@@ -21,23 +27,25 @@ from app.models.voicebot import VoiceConversation, VoiceMessage
 
 # Initialize XTTS TTS model (lazy loaded)
 _xtts_model = None
+_xtts_lock = threading.Lock()
 _executor = ThreadPoolExecutor(max_workers=2)
 
 
 def _get_xtts_model():
-    """Load XTTS model (singleton pattern)"""
+    """Load XTTS model (singleton pattern, safe to call from executor threads)"""
     global _xtts_model
-    if _xtts_model is None:
-        try:
-            from TTS.api import TTS
-            xtts_gpu_enabled = bool(getattr(settings, "XTTS_GPU_ENABLED", False))
-            xtts_model_name = getattr(settings, "XTTS_MODEL", "tts_models/multilingual/multi-dataset/xtts_v2")
-            device = "cuda" if xtts_gpu_enabled else "cpu"
-            _xtts_model = TTS(model_name=xtts_model_name, gpu=xtts_gpu_enabled, progress_bar=False)
-            print(f"✅ XTTS model loaded on {device}")
-        except Exception as e:
-            print(f"❌ Failed to load XTTS model: {str(e)}")
-            _xtts_model = False
+    with _xtts_lock:
+        if _xtts_model is None:
+            try:
+                from TTS.api import TTS
+                xtts_gpu_enabled = bool(getattr(settings, "XTTS_GPU_ENABLED", False))
+                xtts_model_name = getattr(settings, "XTTS_MODEL", "tts_models/multilingual/multi-dataset/xtts_v2")
+                device = "cuda" if xtts_gpu_enabled else "cpu"
+                _xtts_model = TTS(model_name=xtts_model_name, gpu=xtts_gpu_enabled, progress_bar=False)
+                print(f"✅ XTTS model loaded on {device}")
+            except Exception as e:
+                print(f"❌ Failed to load XTTS model: {str(e)}")
+                _xtts_model = False
     return _xtts_model if _xtts_model else None
 
 
@@ -69,11 +77,11 @@ class VoicebotService:
             return None
         return session
 
-    async def transcribe_audio(self, filename: str, audio_bytes: bytes) -> str:
-        """Transcribe audio using Groq Whisper STT"""
+    async def transcribe_audio(self, filename: str, audio_file: BinaryIO) -> str:
+        """Transcribe audio using Groq Whisper STT (the file is streamed, not read into memory)"""
         transcript = await self.groq_client.audio.transcriptions.create(
             model=settings.GROQ_STT_MODEL,
-            file=(filename, audio_bytes),
+            file=(filename, audio_file),
         )
         text = (getattr(transcript, "text", None) or "").strip()
         return text
@@ -81,17 +89,15 @@ class VoicebotService:
     async def _synthesize_xtts(self, text: str) -> Optional[bytes]:
         """Synthesize speech using XTTS model (runs in thread pool)"""
         try:
-            tts_model = _get_xtts_model()
-            if not tts_model:
-                return None
-
-            # Run TTS in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
+            def generate_audio():
+                # Model loading, inference and temp-file IO all stay off the event loop
+                tts_model = _get_xtts_model()
+                if not tts_model:
+                    return None
 
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-                tmp_path = tmp_file.name
+                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
+                    tmp_path = tmp_file.name
 
-            def generate_audio():
                 try:
                     xtts_language = getattr(settings, "XTTS_LANGUAGE", "en")
                     xtts_gpu_enabled = bool(getattr(settings, "XTTS_GPU_ENABLED", False))
@@ -112,6 +118,8 @@ class VoicebotService:
                         os.unlink(tmp_path)
                     return None
 
+            # Run TTS in thread pool to avoid blocking
+            loop = asyncio.get_running_loop()
             audio_bytes = await loop.run_in_executor(_executor, generate_audio)
             return audio_bytes
 
@@ -218,7 +226,7 @@ class VoicebotService:
         employee_id: str,
         session_id: str,
         audio_filename: str,
-        audio_bytes: bytes,
+        audio_file: BinaryIO,
         input_language: Optional[str] = None,
         response_language: Optional[str] = None,
     ) -> Dict:
@@ -228,7 +236,7 @@ class VoicebotService:
             raise ValueError("Voice session not found")
 
         # Step 1: Transcribe user audio
-        user_text = await self.transcribe_audio(audio_filename, audio_bytes)
+        user_text = await self.transcribe_audio(audio_filename, audio_file)
         if not user_text:
             raise ValueError("Could not transcribe audio")
 
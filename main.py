@@ -2,9 +2,13 @@
 Main FastAPI Application
 Entry point for the backend server
 """
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 from datetime import datetime
@@ -24,19 +28,83 @@ from app.models.meal import Meal, DailyMenu
 from app.models.company import CompanySettings
 from app.models.document import GeneratedDocument, DocumentTemplate
 from app.models.voicebot import VoiceConversation
+from app.ai.chatbot import chatbot_service
 
 
 # Import routers
 from app.api.routes import auth, employees, attendance, leaves, chatbot, dashboard, holidays, notifications, announcements, payroll, requests, meals, company
 
+
+def start_log_listener() -> QueueListener:
+    """Route app.* log records through a queue so handlers write off the event loop"""
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(settings.LOG_LEVEL.upper())
+    app_logger.addHandler(QueueHandler(log_queue))
+    app_logger.propagate = False
+
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+async def migrate_employee_unique_indexes(database):
+    """Replace the old non-unique employee_id/email indexes so init_beanie can create the unique ones"""
+    collection = database[Employee.Settings.name]
+    indexes = await collection.index_information()
+    
+    stale = {
+        field: [
+            name for name, info in indexes.items()
+            if info["key"] == [(field, 1)] and not info.get("unique")
+        ]
+        for field in ("employee_id", "email")
+    }
+    stale = {field: names for field, names in stale.items() if names}
+    if not stale:
+        return
+    
+    # Check every field before dropping anything, so a failed migration leaves the indexes untouched
+    blocked = False
+    for field in stale:
+        duplicates = await collection.aggregate([
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+            {"$limit": 20},
+        ]).to_list(length=None)
+        for row in duplicates:
+            blocked = True
+            print(f"❌ Duplicate {field}: {row['_id']!r} ({row['count']} employees)")
+    if blocked:
+        raise RuntimeError("Resolve the duplicate employee values listed above before the unique indexes can be created")
+    
+    for field, names in stale.items():
+        for name in names:
+            await collection.drop_index(name)
+            print(f"🔁 Dropped non-unique index {name}; the unique {field} index is created next")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    log_listener = start_log_listener()
     print("🚀 Starting Enterprise Attendance System...")
     
     # Initialize MongoDB
-    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    client = AsyncIOMotorClient(
+        settings.MONGODB_URL,
+        maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+        minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+        serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        compressors=settings.MONGODB_COMPRESSORS,
+    )
     database = client[settings.MONGODB_DB_NAME]
     
+    # Employee indexes on employee_id/email became unique; migrate databases that still have the old ones
+    await migrate_employee_unique_indexes(database)
+    
     # Initialize Beanie with document models
     await init_beanie(
         database=database,
@@ -87,13 +155,18 @@ async def lifespan(app: FastAPI):
         await admin.insert()
         print("✅ Default admin created (admin@company.com / admin123)")
     
+    # Pre-open the TLS connection so the first chatbot query skips the handshake
+    await chatbot_service.warmup()
+
     print(f"✅ Server running on {settings.HOST}:{settings.PORT}")
     
     yield
     
     # Shutdown
     print("👋 Shutting down...")
+    await chatbot_service.close()
     client.close()
+    log_listener.stop()
 
 
 # Create FastAPI app
@@ -102,6 +175,7 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="Enterprise-grade attendance management system with AI chatbot",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/api/docs",
     redoc_url="/api/redoc"
 )
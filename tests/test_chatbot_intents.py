@@ -0,0 +1,24 @@
+"""
+Chatbot intent routing tests
+"""
+import pytest
+
+from app.ai.chatbot import _mentions_attendance
+
+
+@pytest.mark.parametrize("query", [
+    "show my attendance",
+    "show my attendances",
+    "days i was present-marked",
+    "how many days was i present this month",
+])
+def test_attendance_words_in_any_inflection_route_to_stats(query):
+    assert _mentions_attendance(query.casefold())
+
+
+@pytest.mark.parametrize("query", [
+    "who can represent our team",
+    "what is my leave balance",
+])
+def test_unrelated_words_do_not_route_to_stats(query):
+    assert not _mentions_attendance(query.casefold())
@@ -0,0 +1,49 @@
+"""
+Holiday route tests
+"""
+import asyncio
+from datetime import datetime
+
+import orjson
+from beanie import PydanticObjectId
+
+from app.api.routes import holidays
+from app.models.holiday import Holiday
+
+
+def test_holiday_listing_keeps_the_id_alias(monkeypatch):
+    holiday_id = PydanticObjectId()
+    # model_construct skips Beanie's collection lookup, so no database is needed
+    holiday = Holiday.model_construct(id=holiday_id, name="Republic Day", date=datetime(2026, 1, 26))
+
+    async def fake_cached_holidays():
+        return [holiday]
+
+    monkeypatch.setattr(holidays, "get_cached_holidays", fake_cached_holidays)
+    holidays._holiday_cache.clear()
+
+    listed = orjson.loads(asyncio.run(holidays.get_cached_holidays_json()))
+
+    assert listed[0]["_id"] == str(holiday_id)
+    assert "id" not in listed[0]
+    assert listed[0]["name"] == "Republic Day"
+    holidays._holiday_cache.clear()
+
+
+def test_read_racing_a_write_does_not_cache_stale_holidays(monkeypatch):
+    stale = [Holiday.model_construct(id=PydanticObjectId(), name="Old", date=datetime(2026, 1, 1))]
+
+    class SlowQuery:
+        def sort(self, *args):
+            return self
+
+        async def to_list(self):
+            # An admin write lands while this read is still waiting on Mongo
+            holidays._invalidate_holidays()
+            return stale
+
+    monkeypatch.setattr(holidays.Holiday, "find", classmethod(lambda cls, *args: SlowQuery()))
+    holidays._holiday_cache.clear()
+
+    assert asyncio.run(holidays.get_cached_holidays()) == stale
+    assert holidays._holiday_cache.get("all") is None
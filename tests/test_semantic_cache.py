@@ -0,0 +1,50 @@
+"""
+Semantic cache tests
+"""
+from app.ai.cache import SemanticCache
+
+
+def test_rephrased_question_hits():
+    cache = SemanticCache(threshold=0.92)
+    cache.set("scope", "How do I apply for leave?", "Go to Leaves > Apply.")
+
+    assert cache.get("scope", "how do i apply for leave") == "Go to Leaves > Apply."
+
+
+def test_different_leave_types_do_not_share_answers():
+    cache = SemanticCache(threshold=0.92)
+    cache.set("scope", "What is my casual leave balance?", "You have 8 casual leaves.")
+
+    assert cache.get("scope", "What is my sick leave balance?") is None
+
+
+def test_near_identical_wording_with_different_meaning_misses():
+    cache = SemanticCache(threshold=0.92)
+    cache.set("scope", "how many days of annual leave did I take in march", "3 days")
+
+    assert cache.get("scope", "how many days of annual leave did I take in may") is None
+
+
+def test_answers_are_not_shared_across_scopes():
+    cache = SemanticCache(threshold=0.92)
+    cache.set("alice", "What is my casual leave balance?", "You have 8 casual leaves.")
+
+    assert cache.get("bob", "What is my casual leave balance?") is None
+
+
+def test_entries_are_capped_per_scope_and_overall():
+    cache = SemanticCache(threshold=0.92, max_entries=3, max_entries_per_scope=2)
+    cache.set("a", "first question", "1")
+    cache.set("a", "second question", "2")
+    cache.set("a", "third question", "3")
+
+    assert cache.get("a", "first question") is None
+    assert cache.get("a", "third question") == "3"
+
+    cache.set("b", "fourth question", "4")
+    cache.set("b", "fifth question", "5")
+
+    # The global bound evicts from the least recently used scope
+    assert cache.get("b", "fourth question") == "4"
+    assert cache.get("a", "second question") is None
+    assert cache.get("a", "third question") == "3"